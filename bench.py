@@ -0,0 +1,397 @@
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from src.enums import MarkdownBlockTypes, TextNodeTypes
+from src.htmlnode import LeafNode, ParentNode
+from src.textnode import TextNode
+from src.utils.markdown import (
+    block_to_block_type,
+    extract_markdown_images,
+    extract_markdown_links,
+    markdown_to_blocks,
+    markdown_to_html,
+)
+from src.utils.htmlnode import text_node_to_html_node
+from src.utils.render import render_markdown
+from src.utils.textnode import (
+    split_nodes_image_or_link,
+    split_text_nodes_delimiter,
+    text_to_textnodes,
+)
+
+SENTENCE = (
+    "This is **bold** text with an *italic* word, some `inline code`, "
+    "an ![image](/images/rivendell.png) and a [link](https://boot.dev). "
+)
+WORDS = "the quick brown fox jumps over lazy dogs in middle earth while hobbits eat second breakfast".split()
+
+
+def long_paragraph(sentences: int) -> str:
+    return SENTENCE * sentences
+
+
+def _plain(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _page(rng, sections, paragraph_sentences=3, list_items=5, code_lines=5):
+    blocks = [f"# Page {rng.randrange(1_000_000)}"]
+    for i in range(sections):
+        blocks.append(f"## Section {i}")
+        blocks.append(" ".join(SENTENCE if rng.random() < 0.5 else _plain(rng, 12) + "." for _ in range(paragraph_sentences)))
+        blocks.append("\n".join(f"* {_plain(rng, 6)} [more](/page/{j})" for j in range(list_items)))
+        blocks.append("```\n" + "\n".join(f"print({_plain(rng, 3)!r})" for _ in range(code_lines)) + "\n```")
+        blocks.append("> " + _plain(rng, 20))
+    return "\n\n".join(blocks) + "\n"
+
+
+# name -> function(scale) returning a list of markdown pages
+CORPORA = {
+    # lots of tiny pages, the per-page overhead dominates
+    "small_pages": lambda scale: [_page(random.Random(i), sections=1) for i in range(200 * scale)],
+    # a couple of very big pages, think changelogs and generated references
+    "huge_pages": lambda scale: [_page(random.Random(i), sections=400 * scale) for i in range(2)],
+    # paragraphs full of inline markup
+    "inline_dense": lambda scale: ["# Inline\n\n" + "\n\n".join(long_paragraph(50) for _ in range(20 * scale)) + "\n"],
+    # long lists, the parser has no nested lists so these are long rather than deep
+    "lists": lambda scale: [
+        "# Lists\n\n"
+        + "\n\n".join("\n".join(f"{j + 1}. item *{j}* with `code`" for j in range(200)) for _ in range(10 * scale))
+        + "\n"
+    ],
+    # docs index pages, thousands of links in lists and in running text
+    "links": lambda scale: [
+        "# Index\n\n"
+        + "\n".join(f"* [Page {j}](/docs/{i}/{j}) and its ![icon](/icons/{j}.png)" for j in range(1000 * scale))
+        + "\n\n"
+        + " ".join(f"See [section {j}](/docs/{i}#s{j})." for j in range(1000 * scale))
+        + "\n"
+        for i in range(3)
+    ],
+    # long code blocks, no inline parsing at all
+    "code_blocks": lambda scale: [
+        "# Code\n\n"
+        + "\n\n".join("```\n" + "\n".join(f"x_{j} = compute({j}) * 2" for j in range(500)) + "\n```" for _ in range(10 * scale))
+        + "\n"
+    ],
+}
+
+
+def _inline_texts(pages):
+    # the texts the inline parser actually sees, the same slices `markdown_to_html` takes
+    texts = []
+    for page in pages:
+        for block in markdown_to_blocks(page):
+            block_type = block_to_block_type(block)
+            if block_type == MarkdownBlockTypes.HEADING:
+                texts.append(block.lstrip("#").strip())
+            elif block_type == MarkdownBlockTypes.PARAGRAPH:
+                texts.append(block)
+            elif block_type == MarkdownBlockTypes.QUOTE:
+                texts.append("\n".join(line[2:] for line in block.split("\n")))
+            elif block_type == MarkdownBlockTypes.UNORDERED_LIST:
+                texts.extend(line[2:] for line in block.split("\n"))
+            elif block_type == MarkdownBlockTypes.ORDERED_LIST:
+                texts.extend(line[3:] for line in block.split("\n"))
+    return texts
+
+
+def _stages(pages):
+    # name -> (prepare, run): prepare builds the stage input outside of the timing
+    return {
+        "blocks": (lambda: pages, lambda pages: [markdown_to_blocks(page) for page in pages]),
+        "inline": (lambda: _inline_texts(pages), lambda texts: [text_to_textnodes(text) for text in texts]),
+        "tree": (lambda: pages, lambda pages: [markdown_to_html(page) for page in pages]),
+        "serialize": (
+            lambda: [markdown_to_html(page) for page in pages],
+            lambda nodes: [node.to_html() for node in nodes],
+        ),
+        "total": (lambda: pages, lambda pages: [markdown_to_html(page).to_html() for page in pages]),
+        # the same html without the node tree
+        "direct": (lambda: pages, lambda pages: [render_markdown(page) for page in pages]),
+    }
+
+
+def best_of(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(fn, arg) -> int:
+    # measured in a separate run, tracemalloc slows everything down a lot
+    tracemalloc.start()
+    try:
+        fn(arg)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(corpora: list[str], scale: int = 1, repeat: int = 3) -> dict:
+    results = {}
+    for name in corpora:
+        pages = CORPORA[name](scale)
+        size = sum(len(page.encode()) for page in pages)
+        results[name] = {}
+        for stage, (prepare, run) in _stages(pages).items():
+            arg = prepare()
+            seconds = best_of(run, arg, repeat)
+            results[name][stage] = {
+                "seconds": seconds,
+                "pages_per_s": len(pages) / seconds,
+                "mb_per_s": size / 1e6 / seconds,
+                "peak_kb": peak_memory(run, arg) / 1024,
+            }
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1) -> list[str]:
+    # a stage regressed when it got more than `threshold` slower than the baseline
+    regressions = []
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            base = baseline.get(name, {}).get(stage)
+            if base is None:
+                continue
+            change = result["seconds"] / base["seconds"] - 1
+            if change > threshold:
+                regressions.append(f"{name}/{stage}: {change:+.1%} ({base['seconds'] * 1000:.2f} ms -> {result['seconds'] * 1000:.2f} ms)")
+    return regressions
+
+
+def print_results(results: dict, baseline: dict = None):
+    print(f"{'corpus':<13} {'stage':<10} {'ms':>10} {'pages/s':>11} {'MB/s':>8} {'peak KB':>10} {'vs base':>8}")
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            base = (baseline or {}).get(name, {}).get(stage)
+            change = f"{result['seconds'] / base['seconds'] - 1:+.1%}" if base else ""
+            print(
+                f"{name:<13} {stage:<10} {result['seconds'] * 1000:>10.2f} {result['pages_per_s']:>11.1f} "
+                f"{result['mb_per_s']:>8.2f} {result['peak_kb']:>10.0f} {change:>8}"
+            )
+
+
+def multi_pass_textnodes(text: str) -> list[TextNode]:
+    # the old pipeline, one full pass per delimiter, kept here to compare against
+    nodes = [TextNode(text, TextNodeTypes.TEXT)]
+    for delimiter, name in zip(["**", "*", "`"], [TextNodeTypes.BOLD, TextNodeTypes.ITALIC, TextNodeTypes.CODE]):
+        nodes = split_text_nodes_delimiter(nodes, delimiter, name)
+    nodes = split_nodes_image_or_link(nodes, TextNodeTypes.IMAGE)
+    return split_nodes_image_or_link(nodes, TextNodeTypes.LINK)
+
+
+class DictTextNode(TextNode):
+    # no __slots__ here, so instances get a __dict__ again like before the nodes were slotted
+    pass
+
+
+class DictLeafNode(LeafNode):
+    pass
+
+
+def bench_memory(count: int):
+    # bytes per node for the slotted classes against the same classes with a __dict__
+    print(f"{'node':<10} {'slotted B/node':>15} {'__dict__ B/node':>16} {'saved':>7}")
+    for name, slotted, unslotted, make in [
+        ("TextNode", TextNode, DictTextNode, lambda cls, text: cls(text, TextNodeTypes.BOLD)),
+        ("LeafNode", LeafNode, DictLeafNode, lambda cls, text: cls("b", text)),
+    ]:
+        sizes = []
+        for cls in (slotted, unslotted):
+            # the strings are made up front so only the nodes themselves are measured
+            texts = [f"text {i}" for i in range(count)]
+            tracemalloc.start()
+            nodes = [make(cls, text) for text in texts]
+            sizes.append(tracemalloc.get_traced_memory()[0] / count)
+            tracemalloc.stop()
+            del nodes
+        print(f"{name:<10} {sizes[0]:>15.1f} {sizes[1]:>16.1f} {1 - sizes[0] / sizes[1]:>7.0%}")
+
+
+def reindex_split_links(nodes: list[TextNode], text_type: str) -> list[TextNode]:
+    # the old image/link splitter: findall, then `text.index` to find every match again
+    fn = extract_markdown_images if text_type == TextNodeTypes.IMAGE else extract_markdown_links
+    extra_char = "!" if text_type == TextNodeTypes.IMAGE else ""
+    new_nodes = []
+    for node in nodes:
+        text = node.text
+        parts = fn(text)
+        if not parts:
+            new_nodes.append(node)
+            continue
+        for value, url in parts:
+            part_text = f"{extra_char}[{value}]({url})"
+            start_ix = text.index(part_text)
+            if start_ix > 0:
+                new_nodes.append(TextNode(text[:start_ix], TextNodeTypes.TEXT))
+            new_nodes.append(TextNode(value, text_type, url))
+            text = text[start_ix + len(part_text) :]
+        if text:
+            new_nodes.append(TextNode(text, TextNodeTypes.TEXT))
+    return new_nodes
+
+
+def bench_links(sizes: list[int], repeat: int):
+    # one paragraph with `size` links and images in it, split with spans and re-searched
+    print(f"{'links':>10} {'chars':>10} {'spans MB/s':>12} {'re-search MB/s':>15}")
+    for size in sizes:
+        text = " ".join(f"see [page {i}](/docs/{i}) or ![icon {i}](/icons/{i}.png)" for i in range(size))
+        nodes = [TextNode(text, TextNodeTypes.TEXT)]
+        mb = len(text.encode()) / 1e6
+
+        def spans(nodes):
+            return split_nodes_image_or_link(split_nodes_image_or_link(nodes, TextNodeTypes.IMAGE), TextNodeTypes.LINK)
+
+        def research(nodes):
+            return reindex_split_links(reindex_split_links(nodes, TextNodeTypes.IMAGE), TextNodeTypes.LINK)
+
+        print(f"{size:>10} {len(text):>10} {mb / best_of(spans, nodes, repeat):>12.2f} {mb / best_of(research, nodes, repeat):>15.2f}")
+
+
+def legacy_text_node_to_html_node(text_node: TextNode):
+    # the old converter, `TextNodeTypes.get()` and an if-chain for every node
+    available_types = TextNodeTypes.get()
+    if text_node.text_type not in available_types:
+        raise ValueError(f"Invalid text type: {text_node.text_type}")
+    if text_node.text_type == TextNodeTypes.TEXT:
+        return LeafNode(tag=None, value=text_node.text)
+    if text_node.text_type == TextNodeTypes.BOLD:
+        return LeafNode(tag="b", value=text_node.text)
+    if text_node.text_type == TextNodeTypes.BOLD_ITALIC:
+        return ParentNode(tag="b", children=[LeafNode(tag="i", value=text_node.text)])
+    if text_node.text_type == TextNodeTypes.CODE:
+        return LeafNode(tag="code", value=text_node.text)
+    if text_node.text_type == TextNodeTypes.ITALIC:
+        return LeafNode(tag="i", value=text_node.text)
+    if text_node.text_type == TextNodeTypes.LINK:
+        return LeafNode(tag="a", value=text_node.text, props={"href": text_node.url})
+    if text_node.text_type == TextNodeTypes.IMAGE:
+        return LeafNode(tag="img", value=None, props={"src": text_node.url, "alt": text_node.text})
+
+
+def legacy_block_to_block_type(markdown: str) -> str:
+    # the old classifier, a cascade of startswith checks on the whole block
+    lines = markdown.split("\n")
+    if markdown.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+        return MarkdownBlockTypes.HEADING
+    if lines[0].startswith("```") and lines[-1].startswith("```"):
+        return MarkdownBlockTypes.CODE
+    for prefix, block_type in [(">", MarkdownBlockTypes.QUOTE), ("* ", MarkdownBlockTypes.UNORDERED_LIST), ("- ", MarkdownBlockTypes.UNORDERED_LIST)]:
+        if markdown.startswith(prefix):
+            return block_type if all(line.startswith(prefix) for line in lines) else MarkdownBlockTypes.PARAGRAPH
+    if markdown.startswith("1. "):
+        for i, line in enumerate(lines):
+            if not line.startswith(f"{i+1}. "):
+                return MarkdownBlockTypes.PARAGRAPH
+        return MarkdownBlockTypes.ORDERED_LIST
+    return MarkdownBlockTypes.PARAGRAPH
+
+
+def bench_dispatch(count: int, repeat: int):
+    # per node cost of the dispatch tables against the if-chains they replaced
+    pages = CORPORA["small_pages"](1) + CORPORA["lists"](1)
+    nodes = [node for text in _inline_texts(pages) for node in text_to_textnodes(text)]
+    nodes = (nodes * (count // len(nodes) + 1))[:count]
+    blocks = [block for page in pages for block in markdown_to_blocks(page)]
+    blocks = (blocks * (count // len(blocks) + 1))[:count]
+
+    print(f"{'step':<16} {'count':>8} {'table ns/item':>14} {'if-chain ns/item':>17} {'saved':>7}")
+    for name, items, table, chain in [
+        ("inline nodes", nodes, text_node_to_html_node, legacy_text_node_to_html_node),
+        ("block types", blocks, block_to_block_type, legacy_block_to_block_type),
+    ]:
+        new = best_of(lambda items: [table(item) for item in items], items, repeat) / len(items) * 1e9
+        old = best_of(lambda items: [chain(item) for item in items], items, repeat) / len(items) * 1e9
+        print(f"{name:<16} {len(items):>8} {new:>14.0f} {old:>17.0f} {1 - new / old:>7.0%}")
+
+
+def bench_inline(sizes: list[int], repeat: int):
+    print(f"{'sentences':>10} {'chars':>10} {'single-pass MB/s':>18} {'multi-pass MB/s':>18}")
+    for size in sizes:
+        text = long_paragraph(size)
+        mb = len(text.encode()) / 1e6
+        single = best_of(text_to_textnodes, text, repeat)
+        multi = best_of(multi_pass_textnodes, text, repeat)
+        print(f"{size:>10} {len(text):>10} {mb / single:>18.2f} {mb / multi:>18.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Markdown pipeline benchmarks")
+    parser.add_argument(
+        "--corpus", choices=list(CORPORA), nargs="+", help="Corpora to run, all of them by default", default=list(CORPORA)
+    )
+    parser.add_argument("--scale", type=int, help="Multiplies the size of every corpus", default=1)
+    parser.add_argument("--repeat", type=int, help="Runs per measurement, the best one is kept", default=3)
+    parser.add_argument("--save-baseline", type=str, help="Write the results to this JSON file")
+    parser.add_argument("--compare", type=str, help="Compare against a baseline JSON file")
+    parser.add_argument(
+        "--threshold", type=float, help="Slowdown (0.1 = 10%%) that counts as a regression", default=0.1
+    )
+    parser.add_argument(
+        "--inline-comparison",
+        type=int,
+        nargs="*",
+        metavar="SENTENCES",
+        help="Compare the single-pass and multi-pass inline parsers on paragraphs of these sizes instead",
+    )
+    parser.add_argument(
+        "--links-comparison",
+        type=int,
+        nargs="*",
+        metavar="LINKS",
+        help="Compare the span based and re-searching image/link splitters on paragraphs with this many links instead",
+    )
+    parser.add_argument(
+        "--dispatch-comparison",
+        type=int,
+        nargs="?",
+        const=100_000,
+        metavar="ITEMS",
+        help="Compare the per node cost of the dispatch tables and the old if-chains instead",
+    )
+    parser.add_argument(
+        "--memory", type=int, nargs="?", const=100_000, metavar="NODES", help="Measure the memory used per node instead"
+    )
+    args = parser.parse_args()
+
+    if args.memory is not None:
+        bench_memory(args.memory)
+        sys.exit(0)
+
+    if args.dispatch_comparison is not None:
+        bench_dispatch(args.dispatch_comparison, args.repeat)
+        sys.exit(0)
+
+    if args.links_comparison is not None:
+        bench_links(args.links_comparison or [10, 100, 1000, 5000], args.repeat)
+        sys.exit(0)
+
+    if args.inline_comparison is not None:
+        bench_inline(args.inline_comparison or [10, 100, 1000, 5000], args.repeat)
+        sys.exit(0)
+
+    results = run_benchmarks(args.corpus, args.scale, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print("REGRESSION:", regression)
+        sys.exit(1 if regressions else 0)
@@ -1,78 +1,689 @@
-import shutil, os
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from src.utils.blockcache import BLOCK_CACHE, BLOCK_CACHE_NAME
+from src.utils.compress import COMPRESSED_SUFFIXES, compress_files, precompress
+from src.utils.crawl import DEFAULT_EXCLUDE, PathFilter, crawl
+from src.utils.depgraph import DependencyGraph, dependency_states, link_dependencies
+from src.utils.feeds import FEED_FILES, site_feeds
+from src.utils.manifest import MANIFEST_NAME, BuildManifest, hash_file
 from src.utils.markdown import markdown_to_html
+from src.utils.output import OutputWriter, is_tmp_path
+from src.utils.pageindex import PageIndex
+from src.utils.profiling import PROFILER
+from src.utils.render import iter_markdown_html
+from src.utils.source import SourceScan, iter_source_lines
+from src.utils.sync import SYNC_METHODS, sync_paths, sync_tree
+from src.utils.template import load_template
+from src.utils.watch import watch
 
+CONTENT_DIR = "content"
+TEMPLATE_PATH = "template.html"
+STATIC_DIR = "static"
+PUBLIC_DIR = "public"
+BLOCK_CACHE_PATH = BLOCK_CACHE_NAME
+# with --direct the pages go straight into PUBLIC_DIR, the manifest stays out of it
+DIRECT_MANIFEST_PATH = MANIFEST_NAME
 
-def copy_files(src, dest):
-    files_to_be_removed = filecrawler(dest)
-    files_to_be_removed = sorted(files_to_be_removed, key=lambda x: x[1], reverse=True)
 
-    files_to_be_copied = filecrawler(src)
-
-    for filepath, filetype in files_to_be_removed:
+def copy_files(src, dest, checksum=False, method="copy", owned=()):
+    # only copies what changed and only deletes what's gone from `src`, leaves the
+    # `owned` paths (relative to `dest`) alone, see `sync_tree` for the details
+    stats = sync_tree(
+        src,
+        dest,
+        checksum=checksum,
+        method=method,
+        ignore=(MANIFEST_NAME,),
+        keep_suffixes=COMPRESSED_SUFFIXES,
+        owned=owned,
+    )
+    for filepath in stats.removed:
         print("deleting: ", filepath)
-        if filetype == "dir":
-            os.rmdir(filepath)
-        else:
-            os.remove(filepath)
-    
-    for filepath, filetype in files_to_be_copied:
+    for filepath in stats.copied:
         print("copying: ", filepath)
-        if filetype == "dir":
-            os.makedirs(filepath.replace(src, dest), exist_ok=True)
-        else:
-            shutil.copy(filepath, filepath.replace(src, dest))
-
-def filecrawler(path):
-    paths = []
-    for filename in os.listdir(path):
-        if os.path.isdir(os.path.join(path, filename)):
-            paths.append((os.path.join(path, filename), "dir"))
-            paths.extend(filecrawler(os.path.join(path, filename)))
+    print(f"{len(stats.copied)} copied, {len(stats.skipped)} unchanged, {len(stats.removed)} deleted")
+    return stats
+
+class BuildError(Exception):
+    # raised once at the end of a build with every page that failed,
+    # so one broken page doesn't hide the others. `outputs` are the pages
+    # that did build, like a successful build returns them
+    def __init__(self, errors, outputs=()):
+        self.errors = errors
+        self.outputs = list(outputs)
+        lines = [f"{source}: {error}" for source, error in errors]
+        super().__init__(f"{len(errors)} page(s) failed to build:\n" + "\n".join(lines))
+
+
+def generate_path_recursive(
+    from_path,
+    template_path,
+    dest_path,
+    force=False,
+    jobs=1,
+    explain=False,
+    include=(),
+    exclude=DEFAULT_EXCLUDE,
+    fsync=False,
+    manifest_path=None,
+    static_path=None,
+    drafts=False,
+):
+    # the manifest lives next to the output unless `manifest_path` says otherwise, pages
+    # whose source, template, generator version and dependencies are the same as the
+    # last build are skipped. `explain` prints why each page is built, `include` and
+    # `exclude` are globs for the sources, see `crawl`. `fsync` makes the written pages
+    # durable, see `OutputWriter`. `static_path` is where linked assets are looked up
+    # when that's not `dest_path`. pages marked `draft` in their front matter are left
+    # out unless `drafts` is set. returns the outputs of every page in the manifest.
+    os.makedirs(dest_path, exist_ok=True)
+    manifest = BuildManifest.load(manifest_path or os.path.join(dest_path, MANIFEST_NAME))
+    template = load_template(template_path)
+    template_hash = template.hash
+    state = dependency_states()
+
+    sources = []
+    pages = []
+    hashes = {}
+    # the crawl isn't limited to `include`, every page still there has to be known
+    # for the orphan check, the ones outside the globs are just left as they are
+    selected = PathFilter(from_path, include, exclude=(), ignore_files=())
+    with PROFILER.stage("filecrawler"):
+        entries = list(crawl(from_path, exclude=exclude, stat=True))
+    for entry in entries:
+        source_file = entry.path
+        if entry.is_dir:
+            os.makedirs(source_file.replace(from_path, dest_path), exist_ok=True)
+            continue
+        sources.append(source_file)
+        if not selected.included(entry.rel, False):
+            continue
+        output_path = source_file.replace(from_path, dest_path).replace(".md", ".html")
+        with PROFILER.stage("hash", trace=False):
+            # the size and mtime from the crawl tell whether the recorded hash still holds
+            source_hash = None if force else manifest.known_hash(source_file, entry.size, entry.mtime_ns)
+            if source_hash is None:
+                source_hash = hash_file(source_file)
+        reason = (
+            "forced"
+            if force
+            else manifest.stale_reason(source_file, source_hash, template_hash, output_path, state, drafts)
+        )
+        if reason is None:
+            manifest.touch(source_file, entry.size, entry.mtime_ns)
+            print(f"Skipping unchanged page {source_file}")
+            continue
+        if explain:
+            print(f"Building {source_file}: {reason}")
+        pages.append((source_file, output_path))
+        hashes[source_file] = (source_hash, entry.size, entry.mtime_ns)
+
+    errors, _ = _write_pages(
+        pages, hashes, template, manifest, from_path, dest_path, jobs, fsync, static_path, drafts
+    )
+
+    # the sources that disappeared since the last build, remove their pages too
+    for source_file, entry in manifest.orphans(sources):
+        print(f"Removing page of deleted source {source_file}: {entry['output']}")
+        if os.path.exists(entry["output"]):
+            os.remove(entry["output"])
+        manifest.forget(source_file)
+
+    manifest.save()
+    outputs = [entry["output"] for entry in manifest.entries.values()]
+    if errors:
+        raise BuildError(errors, outputs)
+    return outputs
+
+
+def generate_pages(
+    sources,
+    from_path,
+    template_path,
+    dest_path,
+    changed=(),
+    explain=False,
+    include=(),
+    exclude=DEFAULT_EXCLUDE,
+    fsync=False,
+    manifest_path=None,
+    static_path=None,
+    drafts=False,
+):
+    # rebuilds just the given sources, directories are expanded and the pages of deleted
+    # sources are removed. watch mode uses this so a single edit doesn't crawl the whole site.
+    # the pages that depend on any of the `changed` paths (templates, linked pages and
+    # assets) are checked as well, and rebuilt when that dependency made them stale.
+    # returns the output paths that were written or removed. see `generate_path_recursive`
+    # for the rest of the arguments.
+    manifest = BuildManifest.load(manifest_path or os.path.join(dest_path, MANIFEST_NAME))
+    template = load_template(template_path)
+    state = dependency_states()
+
+    # swap files and the like change all the time, they aren't pages
+    path_filter = PathFilter(from_path, include, exclude)
+    expanded = set()
+    for source in sources:
+        if os.path.isdir(source):
+            subdir = os.path.relpath(source, from_path)
+            expanded.update(entry.path for entry in crawl(from_path, include, exclude, subdir=subdir) if not entry.is_dir)
+        elif source in manifest.entries or (os.path.exists(source) and path_filter.allows(source)):
+            expanded.add(source)
         else:
-            paths.append((os.path.join(path, filename), "file"))
-    return paths
-
-def extract_title(markdown: str) -> str:
-    # we can use the functionality that we have already implemented
-    # but I'll implement a one-liner for this, cuz' they look cool.
-    try: # split document to lines, filter the lines that start with "# "
-         # the `filter` returns an iterator, so you can't index it but get the next element using `next`
-         # return the characters after the first two characters of the line using `[2:]`
-        return next(filter(lambda x: x.startswith("# "), markdown.split("\n")))[2:] 
-    except: # it'll also raise an exception if there is no h1 element
+            # a deleted (or moved away) directory, everything we built from it is gone
+            expanded.update(path for path in manifest.entries if path.startswith(source + os.sep))
+    expanded.update(DependencyGraph(manifest.entries).affected(changed))
+
+    outputs = []
+    pages = []
+    hashes = {}
+    for source_file in sorted(expanded):
+        if not os.path.isfile(source_file):
+            entry = manifest.entries.get(source_file)
+            if entry is not None:
+                print(f"Removing page of deleted source {source_file}: {entry['output']}")
+                if os.path.exists(entry["output"]):
+                    os.remove(entry["output"])
+                outputs.append(entry["output"])
+                manifest.forget(source_file)
+            continue
+        output_path = source_file.replace(from_path, dest_path).replace(".md", ".html")
+        st = os.stat(source_file)
+        source_hash = manifest.known_hash(source_file, st.st_size, st.st_mtime_ns) or hash_file(source_file)
+        reason = manifest.stale_reason(source_file, source_hash, template.hash, output_path, state, drafts)
+        if reason is None:
+            continue
+        if explain:
+            print(f"Building {source_file}: {reason}")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        pages.append((source_file, output_path))
+        hashes[source_file] = (source_hash, st.st_size, st.st_mtime_ns)
+
+    errors, written = _write_pages(
+        pages, hashes, template, manifest, from_path, dest_path, fsync=fsync, static_path=static_path, drafts=drafts
+    )
+    if outputs or written or errors:
+        manifest.save()
+    if errors:
+        raise BuildError(errors, outputs + written)
+    return outputs + written
+
+
+def _write_pages(
+    pages, hashes, template, manifest, from_path, dest_path, jobs=1, fsync=False, static_path=None, drafts=False
+):
+    # returns the errors and the outputs that actually changed (or were removed), a page
+    # that renders to the same html as before isn't rewritten. the pages are put in place
+    # all at once at the end, before the manifest that refers to them is saved.
+    errors = []
+    removed = []
+    state = dependency_states()
+    with OutputWriter(fsync=fsync) as writer:
+        for source_file, output_path, html, error, links, meta in render_pages(pages, template, jobs, drafts):
+            if error is not None:
+                errors.append((source_file, error))
+                # make sure a failed page gets retried on the next build
+                manifest.forget(source_file)
+                continue
+            source_hash, size, mtime_ns = hashes[source_file]
+            if html is None:
+                # a draft, it stays out of the site (and its metadata out of the listings)
+                # until it's built with drafts
+                print(f"Skipping draft {source_file}")
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                    removed.append(output_path)
+                manifest.record(
+                    source_file, source_hash, template.hash, output_path, {}, size, mtime_ns, meta, skipped=True
+                )
+                continue
+            layout = page_template(template, meta)
+            print(f"Generating page from {source_file} to {output_path} using {layout.path}")
+            with PROFILER.stage("write", trace=False):
+                output_size = writer.write(output_path, html)
+            linked, broken = link_dependencies(links, output_path, from_path, dest_path, static_path)
+            for url in broken:
+                print(f"Warning: {source_file} links to {url}, which doesn't exist")
+            dependencies = {os.path.normpath(layout.path): "template", **linked}
+            dependencies = {path: [kind, state(kind, path)] for path, kind in dependencies.items()}
+            manifest.record(
+                source_file,
+                source_hash,
+                template.hash,
+                output_path,
+                dependencies,
+                size,
+                mtime_ns,
+                meta,
+                output_size=output_size,
+            )
+    if pages:
+        print(f"{len(writer.written)} page(s) written, {len(writer.unchanged)} unchanged")
+    return errors, writer.written + removed
+
+
+def render_pages(pages, template, jobs=1, drafts=False):
+    # renders (source, output) pairs, yields (source, output, html, error, links, meta) in the same
+    # order as `pages` regardless of the number of jobs so the build output stays deterministic.
+    # the html is encoded already, the way it's written.
+    # `meta` is the front matter plus the title, drafts come back without html unless `drafts` is set.
+    if jobs <= 1 or len(pages) <= 1:
+        yield from _render_chunk(pages, template, drafts)
+        return
+
+    # hand the pages out in chunks, one task per page costs more in pickling than the rendering itself
+    chunksize = max(1, len(pages) // (jobs * 4))
+    chunks = [pages[i : i + chunksize] for i in range(0, len(pages), chunksize)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        if not PROFILER.enabled and not BLOCK_CACHE.enabled:
+            for results in executor.map(_render_chunk, chunks, repeat(template), repeat(drafts)):
+                yield from results
+            return
+        # the workers profile themselves and fill their own block cache, and send their
+        # numbers and new cache entries back with the results
+        workers = executor.map(
+            _instrumented_render_chunk,
+            chunks,
+            repeat(template),
+            repeat(PROFILER.enabled),
+            repeat(BLOCK_CACHE.max_entries if BLOCK_CACHE.enabled else None),
+            repeat(drafts),
+        )
+        for results, snapshot, blocks in workers:
+            if snapshot is not None:
+                PROFILER.merge(snapshot)
+            if blocks is not None:
+                BLOCK_CACHE.merge(blocks)
+            yield from results
+
+
+def _instrumented_render_chunk(pages, template, profile, block_cache_entries, drafts=False):
+    if profile:
+        PROFILER.reset()
+        PROFILER.enabled = True
+    if block_cache_entries is not None and not BLOCK_CACHE.enabled:
+        # a worker that wasn't forked from the parent starts with an empty cache
+        BLOCK_CACHE.max_entries = block_cache_entries
+        BLOCK_CACHE.enabled = True
+    results = _render_chunk(pages, template, drafts)
+    snapshot = PROFILER.snapshot() if profile else None
+    blocks = BLOCK_CACHE.snapshot() if block_cache_entries is not None else None
+    return results, snapshot, blocks
+
+
+def _render_chunk(pages, template, drafts=False):
+    results = []
+    for from_path, dest_path in pages:
+        with PROFILER.page(from_path) as page:
+            try:
+                # the source is read line by line as the blocks are parsed, never whole, and the
+                # title and the urls of the links and images (the parent resolves those into
+                # dependencies) are picked up on the way
+                scan = SourceScan(iter_source_lines(from_path))
+                if scan.meta.get("draft") is True and not drafts:
+                    results.append((from_path, dest_path, None, None, None, scan.meta))
+                    continue
+                # encoded already, the size and the write both use the bytes
+                html = _render_scan(scan, template)
+                meta = {**scan.meta, "title": scan.page_title(), "summary": scan.page_summary()}
+                results.append((from_path, dest_path, html, None, scan.links, meta))
+                if page is not None:
+                    page["bytes_in"] = os.path.getsize(from_path)
+                    page["bytes_out"] = len(html)
+            except Exception as e:
+                results.append((from_path, dest_path, None, f"{type(e).__name__}: {e}", None, None))
+    return results
+
+
+def _scanned_title(scan):
+    # the front matter's title or the first "# " line, from the lines the parser already went through
+    title = scan.page_title()
+    if title is None:
         raise Exception("No title found in the markdown file")
+    return title
+
+
+def page_template(template, meta):
+    # the template a page asked for with `template` in its front matter, relative to
+    # the default one, which is what everything else gets
+    name = (meta or {}).get("template")
+    if not name:
+        return template
+    return load_template(os.path.join(os.path.dirname(template.path or ""), name))
+
+
+def _render_scan(scan, template) -> bytes:
+    # bulk builds don't need the node tree, the direct renderer gives the same html
+    # without building it, `markdown_to_html` is still there for everything else.
+    # the "render" stage includes reading the source, that happens as the blocks are parsed.
+    # the page comes out encoded: each block is encoded as it's rendered and the page is
+    # joined once, so a big page isn't held as a string, its encoding and its parts at once
+    template = page_template(template, scan.meta)
+    with PROFILER.stage("render", trace=False):
+        htmlcode = b"".join(html.encode() for html in iter_markdown_html(scan))
+    # fill the title and content slots of the template, every front matter key has a slot too
+    with PROFILER.stage("template", trace=False):
+        return template.render_bytes(**{**scan.meta, "title": _scanned_title(scan), "content": htmlcode})
 
-def generate_path_recursive(from_path, template_path, dest_path):
-    source_files = filecrawler(from_path)
-    for source_file, filetype in source_files:
-        if filetype == "file":
-            generate_page(source_file, template_path, source_file.replace(from_path, dest_path).replace(".md", ".html"))
-        else:
-            os.makedirs(source_file.replace(from_path, dest_path), exist_ok=True)
 
 def generate_page(from_path, template_path, dest_path):
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    with open(from_path, "r") as file:
-        markdown_content = file.read()
-    with open(template_path, "r") as f:
-        template_content = f.read()
-
-    title = extract_title(markdown_content)
-    # now we can also convert the markdown content to blocks
-    htmlnode = markdown_to_html(markdown_content)
-    htmlcode = htmlnode.to_html()
-    # replace the title and content placeholders in the template
-    template_content = template_content.replace("{{ title }}", title).replace("{{ content }}", htmlcode)
-    with open(dest_path, "w") as f:
-        f.write(template_content)
+    scan = SourceScan(iter_source_lines(from_path))
+    template = page_template(load_template(template_path), scan.meta)
+    htmlnode = markdown_to_html(scan)
+    title = _scanned_title(scan)
+    # stream the content straight into the file instead of building the whole page in memory
+    with OutputWriter() as writer:
+        with writer.open(dest_path) as f:
+            template.write(f, **{**scan.meta, "title": title, "content": htmlnode})
     print(f"Page generated successfully at {dest_path}")
     return
 
 
+def generate_feeds(dest_path, site_url, title=None, manifest_path=None, fsync=False, author=None):
+    # sitemap.xml, feed.xml and atom.xml for the pages in `dest_path`, made from the page
+    # index in the manifest, no source is read again. files that come out the same as
+    # before aren't rewritten, returns the ones that were.
+    manifest = BuildManifest.load(manifest_path or os.path.join(dest_path, MANIFEST_NAME))
+    index = PageIndex.from_manifest(manifest, dest_path)
+    with OutputWriter(fsync=fsync) as writer:
+        for name, data in site_feeds(index, site_url, title, author).items():
+            writer.write(os.path.join(dest_path, name), data)
+    for filepath in writer.written:
+        print("feed: ", filepath)
+    return writer.written
+
+
+def precompress_files(path, jobs=None):
+    # writes .gz (and .br when brotli is installed) next to the html, css and js files,
+    # only for the files that changed since their variants were written
+    written = precompress(path, jobs=jobs)
+    for filepath in written:
+        print("compressed: ", filepath)
+    print(f"{len(written)} compressed file(s) written")
+
+
+def _is_under(path, directory):
+    path = os.path.normpath(path)
+    return path == directory or path.startswith(directory + os.sep)
+
+
+def _owned_outputs(manifest, dest_path):
+    # the rendered pages in `dest_path`, relative to it, the sync leaves those alone
+    return {os.path.relpath(entry["output"], dest_path) for entry in manifest.entries.values()}
+
+
+def _own_writes(changes, direct=False, site_url=None):
+    # what the last build wrote into static/ comes back from the watcher: the pages, the
+    # feeds and the temporary files they went through. none of those are edits
+    own = {path for path in changes if is_tmp_path(path)}
+    if not direct:
+        manifest = BuildManifest.load(os.path.join(STATIC_DIR, MANIFEST_NAME))
+        outputs = {os.path.normpath(entry["output"]) for entry in manifest.entries.values()}
+        if site_url:
+            outputs.update(os.path.join(STATIC_DIR, name) for name in FEED_FILES)
+        own.update(path for path in changes if os.path.normpath(path) in outputs)
+    return own
+
+
+def rebuild(
+    changes,
+    checksum=False,
+    method="copy",
+    compress=False,
+    block_cache_file=None,
+    explain=False,
+    include=(),
+    exclude=DEFAULT_EXCLUDE,
+    fsync=False,
+    direct=False,
+    drafts=False,
+    site_url=None,
+    feed_title=None,
+    feed_author=None,
+):
+    # watch mode callback, works out what the changed paths affect and rebuilds only that:
+    # the changed pages themselves, and the pages whose template or linked pages and
+    # assets changed according to the dependency graph in the manifest.
+    # `direct` renders the pages into PUBLIC_DIR, then only the assets are synced.
+    # with a `site_url` the feeds and sitemap follow the pages that changed.
+    # our own manifest and page writes show up as changes too, those don't need a rebuild
+    changes = {path for path in changes if not os.path.basename(path).startswith(MANIFEST_NAME)}
+    changes -= _own_writes(changes, direct, site_url)
+    if not changes:
+        return
+    start = time.perf_counter()
+    sources = [path for path in changes if _is_under(path, CONTENT_DIR)]
+    try:
+        outputs = generate_pages(
+            sources,
+            CONTENT_DIR,
+            TEMPLATE_PATH,
+            PUBLIC_DIR if direct else STATIC_DIR,
+            changed=changes,
+            explain=explain,
+            include=include,
+            exclude=exclude,
+            fsync=fsync,
+            manifest_path=DIRECT_MANIFEST_PATH if direct else None,
+            static_path=STATIC_DIR,
+            drafts=drafts,
+        )
+    except BuildError as e:
+        print(e)
+        # the manifest already has the pages that did build as fresh, the next rebuild
+        # won't write them again so they have to be published now
+        outputs = e.outputs
+    if site_url and outputs:
+        outputs += generate_feeds(
+            PUBLIC_DIR if direct else STATIC_DIR,
+            site_url,
+            feed_title,
+            manifest_path=DIRECT_MANIFEST_PATH if direct else None,
+            fsync=fsync,
+            author=feed_author,
+        )
+    assets = [path for path in changes if _is_under(path, STATIC_DIR)]
+    if direct:
+        # a stale page left in static/ mustn't overwrite the rendered one
+        owned = _owned_outputs(BuildManifest.load(DIRECT_MANIFEST_PATH), PUBLIC_DIR)
+        if site_url:
+            owned.update(FEED_FILES)
+        rels = [rel for rel in (os.path.relpath(path, STATIC_DIR) for path in assets) if rel not in owned]
+    else:
+        rels = [os.path.relpath(path, STATIC_DIR) for path in assets + outputs]
+    stats = sync_paths(
+        STATIC_DIR, PUBLIC_DIR, rels, checksum=checksum, method=method, keep_suffixes=COMPRESSED_SUFFIXES
+    )
+    for filepath in stats.removed:
+        print("deleting: ", filepath)
+    for filepath in stats.copied:
+        print("copying: ", filepath)
+    if compress:
+        written = stats.copied
+        if direct:
+            written = written + [path for path in outputs if os.path.exists(path)]
+        for filepath in compress_files(written):
+            print("compressed: ", filepath)
+    if block_cache_file:
+        # the cache stays warm in memory between rebuilds, the file is for the next run
+        BLOCK_CACHE.save(block_cache_file)
+    print(f"Rebuilt {len(changes)} change(s) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
 def main():
-    generate_path_recursive("content", "template.html", "static")
-    copy_files("static", "public")
-    print("Copied files from `static` to `public`")
+    parser = argparse.ArgumentParser(description="Static site generator")
+    parser.add_argument(
+        "--force", action="store_true", help="Rebuild every page, ignoring the build manifest"
+    )
+    parser.add_argument(
+        "--explain", action="store_true", help="Print why each page is built"
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        metavar="GLOB",
+        help="Only build the sources matching this glob, the other pages stay as they are, can be given more than once",
+        default=[],
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        metavar="GLOB",
+        help="Skip the sources matching this glob (.gitignore syntax), can be given more than once",
+        default=[],
+    )
+    parser.add_argument(
+        "--drafts", action="store_true", help="Build the pages marked as drafts in their front matter too"
+    )
+    parser.add_argument(
+        "--site-url",
+        type=str,
+        metavar="URL",
+        help="Where the site is hosted, writes sitemap.xml and the RSS/Atom feeds with it",
+    )
+    parser.add_argument("--feed-title", type=str, help="Title of the feeds, the home page's title by default")
+    parser.add_argument("--feed-author", type=str, help="Author of the Atom feed, the feed's title by default")
+    parser.add_argument(
+        "--fsync", action="store_true", help="Sync the generated pages to disk before the build finishes"
+    )
+    parser.add_argument(
+        "--direct",
+        action="store_true",
+        help=f"Render the pages straight into `{PUBLIC_DIR}`, `{STATIC_DIR}` only holds the assets",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, help="Number of processes to render pages with", default=1
+    )
+    parser.add_argument(
+        "--checksum", action="store_true", help="Compare static files by content hash instead of size and mtime"
+    )
+    parser.add_argument(
+        "--sync-method", choices=SYNC_METHODS, help="How changed static files are transferred", default="copy"
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Write gzip/brotli variants of the html, css and js files in the output",
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="Time every build stage and print the slowest pages"
+    )
+    parser.add_argument("--profile-top", type=int, help="Number of slowest pages to show", default=10)
+    parser.add_argument("--profile-json", type=str, help="Write the profile as JSON to this file")
+    parser.add_argument("--profile-trace", type=str, help="Write the profile as a Chrome trace to this file")
+    parser.add_argument(
+        "--block-cache",
+        type=int,
+        nargs="?",
+        const=10_000,
+        metavar="ENTRIES",
+        help="Reuse the html of blocks repeated across pages, keeping up to this many blocks",
+    )
+    parser.add_argument(
+        "--block-cache-file",
+        type=str,
+        nargs="?",
+        const=BLOCK_CACHE_PATH,
+        help="Keep the block cache in this file between builds, implies --block-cache",
+    )
+    parser.add_argument(
+        "--watch", action="store_true", help="Keep running and rebuild whatever changes"
+    )
+    parser.add_argument(
+        "--debounce", type=float, help="Seconds to wait for a burst of changes to settle in watch mode", default=0.05
+    )
+    args = parser.parse_args()
+    exclude = DEFAULT_EXCLUDE + tuple(args.exclude)
+
+    PROFILER.enabled = args.profile or bool(args.profile_json or args.profile_trace)
+    if args.block_cache is not None or args.block_cache_file:
+        BLOCK_CACHE.enabled = True
+        if args.block_cache is not None:
+            BLOCK_CACHE.max_entries = args.block_cache
+        if args.block_cache_file:
+            BLOCK_CACHE.load(args.block_cache_file)
+    with PROFILER.stage("build"):
+        with PROFILER.stage("generate"):
+            outputs = generate_path_recursive(
+                CONTENT_DIR,
+                TEMPLATE_PATH,
+                PUBLIC_DIR if args.direct else STATIC_DIR,
+                force=args.force,
+                jobs=args.jobs,
+                explain=args.explain,
+                include=args.include,
+                exclude=exclude,
+                fsync=args.fsync,
+                manifest_path=DIRECT_MANIFEST_PATH if args.direct else None,
+                static_path=STATIC_DIR,
+                drafts=args.drafts,
+            )
+        if args.site_url:
+            with PROFILER.stage("feeds"):
+                generate_feeds(
+                    PUBLIC_DIR if args.direct else STATIC_DIR,
+                    args.site_url,
+                    args.feed_title,
+                    manifest_path=DIRECT_MANIFEST_PATH if args.direct else None,
+                    fsync=args.fsync,
+                    author=args.feed_author,
+                )
+        # in direct mode the pages (and feeds) are already in place, the sync only brings the assets over
+        owned = ()
+        if args.direct:
+            owned = [os.path.relpath(path, PUBLIC_DIR) for path in outputs]
+            if args.site_url:
+                owned += FEED_FILES
+        with PROFILER.stage("copy_files"):
+            copy_files(STATIC_DIR, PUBLIC_DIR, checksum=args.checksum, method=args.sync_method, owned=owned)
+        print(f"Copied files from `{STATIC_DIR}` to `{PUBLIC_DIR}`")
+        if args.precompress:
+            with PROFILER.stage("precompress"):
+                precompress_files(PUBLIC_DIR)
+
+    if PROFILER.enabled:
+        print(PROFILER.report(args.profile_top))
+        if args.profile_json:
+            PROFILER.dump(args.profile_json)
+        if args.profile_trace:
+            PROFILER.dump(args.profile_trace, chrome_trace=True)
+        # watch mode rebuilds aren't profiled
+        PROFILER.enabled = False
+
+    if BLOCK_CACHE.enabled:
+        print(BLOCK_CACHE.report())
+        if args.block_cache_file:
+            BLOCK_CACHE.save(args.block_cache_file)
+
+    if args.watch:
+        print(f"Watching `{CONTENT_DIR}`, `{STATIC_DIR}` and `{TEMPLATE_PATH}` for changes...")
+        try:
+            watch(
+                [CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH],
+                lambda changes: rebuild(
+                    changes,
+                    checksum=args.checksum,
+                    method=args.sync_method,
+                    compress=args.precompress,
+                    block_cache_file=args.block_cache_file,
+                    explain=args.explain,
+                    include=args.include,
+                    exclude=exclude,
+                    fsync=args.fsync,
+                    direct=args.direct,
+                    drafts=args.drafts,
+                    site_url=args.site_url,
+                    feed_title=args.feed_title,
+                    feed_author=args.feed_author,
+                ),
+                debounce=args.debounce,
+            )
+        except KeyboardInterrupt:
+            pass
 
 
 if __name__ == "__main__":
@@ -1,6 +1,23 @@
 import argparse
+import asyncio
+import email.utils
+import hashlib
+import mimetypes
 import os
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+import threading
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from src.utils.watch import watch
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    b'<script>new EventSource("' + LIVE_RELOAD_PATH.encode() + b'").onmessage = () => location.reload();</script>'
+)
+REASONS = {200: "OK", 301: "Moved Permanently", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+# content-encoding -> file extension of the precompressed sibling, in order of preference
+PRECOMPRESSED = [("br", ".br"), ("gzip", ".gz")]
 
 
 def run(
@@ -17,12 +34,414 @@ def run(
     httpd.serve_forever()
 
 
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    # "gzip, br;q=0.8, *;q=0" -> {"gzip": 1.0, "br": 0.8, "*": 0.0}
+    codings = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[name.lower()] = q
+    return codings
+
+
+def parse_range(header: str, size: int):
+    # single "bytes=" ranges only, returns (start, end) inclusive, None when the header
+    # should be ignored (missing, malformed or multiple ranges) and ValueError when the
+    # range can't be satisfied.
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, sep, end = header[len("bytes=") :].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start == "":
+            # the last N bytes
+            length = int(end)
+            if length == 0:
+                raise ValueError("empty suffix range")
+            return max(0, size - length), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, min(end, size - 1)
+
+
+# (path, size, mtime_ns) -> etag, so a file is hashed once per version
+_etags: dict[tuple, str] = {}
+_etags_lock = threading.Lock()
+
+
+def file_etag(path: str, st: os.stat_result) -> str:
+    # strong etag from the contents, it only changes when the bytes change
+    key = (path, st.st_size, st.st_mtime_ns)
+    with _etags_lock:
+        etag = _etags.get(key)
+    if etag is None:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+        etag = f'"{digest.hexdigest()[:32]}"'
+        with _etags_lock:
+            _etags[key] = etag
+    return etag
+
+
+class StaticFileHandler(SimpleHTTPRequestHandler):
+    # serving mode for running behind a cache: keep-alive, strong etags with 304s,
+    # single byte ranges, precompressed .br/.gz siblings and sendfile for the body.
+    protocol_version = "HTTP/1.1"
+    # drop idle keep-alive connections instead of holding a thread forever
+    timeout = 30
+
+    def do_GET(self):
+        self.serve(head=False)
+
+    def do_HEAD(self):
+        self.serve(head=True)
+
+    def serve(self, head):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, "index.html")
+            if not urlsplit(self.path).path.endswith("/") or not os.path.isfile(index):
+                # redirects and directory listings are left to SimpleHTTPRequestHandler
+                return super().do_HEAD() if head else super().do_GET()
+            path = index
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        content_type = self.guess_type(path)
+        encoding, file_path = self.negotiate(path)
+        try:
+            f = open(file_path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            etag = file_etag(file_path, st)
+            last_modified = self.date_time_string(st.st_mtime)
+            headers = {
+                "Content-Type": content_type,
+                "ETag": etag,
+                "Last-Modified": last_modified,
+                "Accept-Ranges": "bytes",
+                "Vary": "Accept-Encoding",
+            }
+            if encoding:
+                headers["Content-Encoding"] = encoding
+
+            if self.not_modified(etag, st.st_mtime):
+                self.send_headers(HTTPStatus.NOT_MODIFIED, headers)
+                return
+
+            start, end = 0, st.st_size - 1
+            status = HTTPStatus.OK
+            if self.range_applies(etag, last_modified):
+                try:
+                    byte_range = parse_range(self.headers.get("Range"), st.st_size)
+                except ValueError:
+                    headers["Content-Range"] = f"bytes */{st.st_size}"
+                    headers["Content-Length"] = "0"
+                    self.send_headers(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, headers)
+                    return
+                if byte_range is not None:
+                    start, end = byte_range
+                    status = HTTPStatus.PARTIAL_CONTENT
+                    headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+
+            headers["Content-Length"] = str(end - start + 1)
+            self.send_headers(status, headers)
+            if not head:
+                self.send_body(f, start, end - start + 1)
+
+    def negotiate(self, path):
+        # serve the precompressed sibling when the client accepts it and it isn't stale
+        accepted = parse_accept_encoding(self.headers.get("Accept-Encoding"))
+        mtime = os.stat(path).st_mtime_ns
+        for encoding, extension in PRECOMPRESSED:
+            if accepted.get(encoding, accepted.get("*", 0.0)) <= 0:
+                continue
+            sibling = path + extension
+            try:
+                if os.stat(sibling).st_mtime_ns >= mtime:
+                    return encoding, sibling
+            except OSError:
+                continue
+        return None, path
+
+    def not_modified(self, etag, mtime):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            # weak comparison is what If-None-Match asks for
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    def range_applies(self, etag, last_modified):
+        if "Range" not in self.headers:
+            return False
+        if_range = self.headers.get("If-Range")
+        # the range is only for the version the client already has part of
+        return if_range is None or if_range in (etag, last_modified)
+
+    def send_headers(self, status, headers):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def send_body(self, f, offset, count):
+        # zero-copy from the page cache to the socket where we can
+        try:
+            out_fd = self.connection.fileno()
+            while count > 0:
+                sent = os.sendfile(out_fd, f.fileno(), offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+                count -= sent
+        except (AttributeError, OSError) as e:
+            if isinstance(e, (BrokenPipeError, ConnectionResetError)):
+                return
+            # no sendfile (or not on this kind of socket), plain copy of what's left
+            f.seek(offset)
+            while count > 0:
+                chunk = f.read(min(count, 1 << 16))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                count -= len(chunk)
+
+
+def inject_live_reload(html: bytes) -> bytes:
+    # right before the closing body tag, or at the very end if there's none
+    ix = html.lower().rfind(b"</body>")
+    if ix == -1:
+        return html + LIVE_RELOAD_SCRIPT
+    return html[:ix] + LIVE_RELOAD_SCRIPT + html[ix:]
+
+
+def resolve_path(directory: str, url_path: str):
+    # maps a request path to a file under `directory`, None if it points outside of it
+    path = os.path.normpath(unquote(url_path).lstrip("/"))
+    if path == ".":
+        path = ""
+    if path.startswith(".."):
+        return None
+    return os.path.join(directory, path)
+
+
+class DevServer:
+    # asyncio based development server: every connection is its own task so a slow
+    # client never blocks the others, html responses get a tiny live-reload client
+    # which listens for server-sent events on LIVE_RELOAD_PATH.
+
+    def __init__(self, directory: str, port: int = 8888, host: str = "", chunk_size: int = 1 << 16):
+        self.directory = os.path.abspath(directory)
+        self.host = host
+        self.port = port
+        self.chunk_size = chunk_size
+        self.clients = set()  # one asyncio.Queue per live-reload connection, None ends it
+        self.loop = None
+        self.server = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        # port 0 picks a free port, remember which one we got
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            self._close_clients()
+
+    async def stop(self):
+        # stops listening and ends the live-reload streams, the browsers reconnect on their own
+        self._close_clients()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def _close_clients(self):
+        for queue in self.clients:
+            queue.put_nowait(None)
+
+    def reload(self):
+        # safe to call from any thread, e.g. the file watcher
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._broadcast, "reload")
+
+    def _broadcast(self, message: str):
+        for queue in self.clients:
+            queue.put_nowait(message)
+
+    def watch(self, debounce: float = 0.1):
+        # reload the browsers whenever the served directory changes, the debounce
+        # makes a whole rebuild end up as a single reload
+        thread = threading.Thread(
+            target=watch, args=([self.directory], lambda changes: self.reload()), kwargs={"debounce": debounce}, daemon=True
+        )
+        thread.start()
+        return thread
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            # the headers aren't needed for anything, just consume them
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) != 3:
+                await self.respond(writer, 400)
+                return
+            method, target, _ = parts
+            if method not in ("GET", "HEAD"):
+                await self.respond(writer, 405)
+                return
+
+            url_path = urlsplit(target).path
+            if url_path == LIVE_RELOAD_PATH:
+                await self.live_reload(writer)
+                return
+            await self.send_file(writer, url_path, head=method == "HEAD")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # the loop is shutting down with the connection still open, it's closed below.
+            # re-raising only gets the cancellation logged by the stream protocol
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, headers=None, body=b""):
+        # a None header is left out, e.g. Content-Length for streams without an end
+        headers = dict(headers or {})
+        headers.setdefault("Content-Length", str(len(body)))
+        headers["Connection"] = "close"
+        head = f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        head += "".join(f"{key}: {value}\r\n" for key, value in headers.items() if value is not None)
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+    async def send_file(self, writer, url_path, head=False):
+        path = resolve_path(self.directory, url_path)
+        if path is None:
+            await self.respond(writer, 404)
+            return
+        if os.path.isdir(path):
+            if not url_path.endswith("/"):
+                # same as SimpleHTTPRequestHandler, relative links need the trailing slash
+                await self.respond(writer, 301, {"Location": url_path + "/"})
+                return
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path):
+            await self.respond(writer, 404)
+            return
+
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type == "text/html":
+            # pages are small, read them whole so the reload client can be injected
+            body = await self.loop.run_in_executor(None, _read_file, path)
+            body = inject_live_reload(body)
+            headers = {"Content-Type": content_type, "Content-Length": str(len(body))}
+            await self.respond(writer, 200, headers, b"" if head else body)
+            return
+
+        size = os.path.getsize(path)
+        await self.respond(writer, 200, {"Content-Type": content_type, "Content-Length": str(size)})
+        if head:
+            return
+        # everything else is streamed in chunks, the reads happen off the event loop
+        with open(path, "rb") as f:
+            while True:
+                chunk = await self.loop.run_in_executor(None, f.read, self.chunk_size)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+
+    async def live_reload(self, writer):
+        await self.respond(
+            writer,
+            200,
+            {"Content-Type": "text/event-stream", "Cache-Control": "no-cache", "Content-Length": None},
+        )
+        queue = asyncio.Queue()
+        self.clients.add(queue)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                    if message is None:
+                        # the server stopped
+                        return
+                    writer.write(f"data: {message}\n\n".encode())
+                except asyncio.TimeoutError:
+                    # a comment line, keeps proxies from dropping the idle connection
+                    writer.write(b": ping\n\n")
+                await writer.drain()
+        finally:
+            self.clients.discard(queue)
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def run_dev(port=8888, directory="."):
+    server = DevServer(directory, port)
+    server.watch()
+    print(f"Serving HTTP with live reload on http://localhost:{port} from directory '{directory}'...")
+    asyncio.run(server.serve_forever())
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="HTTP Server")
     parser.add_argument(
         "--dir", type=str, help="Directory to serve files from", default="."
     )
     parser.add_argument("--port", type=int, help="Port to serve HTTP on", default=8888)
+    parser.add_argument(
+        "--dev", action="store_true", help="Serve concurrently and reload the browser when the files change"
+    )
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Threaded server with etags, range requests and precompressed files",
+    )
     args = parser.parse_args()
 
-    run(port=args.port, directory=args.dir)
+    if args.dev:
+        run_dev(port=args.port, directory=args.dir)
+    elif args.production:
+        run(ThreadingHTTPServer, StaticFileHandler, port=args.port, directory=args.dir)
+    else:
+        run(port=args.port, directory=args.dir)
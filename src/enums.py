@@ -4,6 +4,7 @@ class TextNodeTypes:
     LINK = "link"
     BOLD = "bold"
     ITALIC = "italic"
+    BOLD_ITALIC = "bold_italic"
     CODE = "code"
 
     @classmethod
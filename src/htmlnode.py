@@ -1,9 +1,15 @@
+import sys
 import typing as t
 
 
 class HTMLNode:
+    # slotted, big pages keep millions of nodes alive at once.
+    # subclasses have to declare `__slots__ = ()` too or they get a __dict__ back.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag, props=None, value=None, children=None):
-        self.tag = tag
+        # tags repeat all the time, share the strings
+        self.tag = sys.intern(tag) if type(tag) is str else tag
         self.value = value
         self.children = children
         self.props = props
@@ -11,8 +17,21 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError()
 
+    def iter_html(self) -> t.Iterator[str]:
+        # chunks of html that join up to `to_html()`, nodes with children
+        # override this to stream their subtrees instead of building one big string
+        yield self.to_html()
+
+    def write_html(self, fp: t.TextIO):
+        fp.writelines(self.iter_html())
+
     def __eq__(self, other):
-        if isinstance(other, HTMLNode) and self.__dict__ == other.__dict__:
+        if isinstance(other, HTMLNode) and (self.tag, self.value, self.children, self.props) == (
+            other.tag,
+            other.value,
+            other.children,
+            other.props,
+        ):
             return True
 
     def props_to_html(self):
@@ -27,6 +46,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, props, value)
 
@@ -43,6 +64,8 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, props=None, value=None, children=None):
         super().__init__(tag, props, value, children)
 
@@ -50,16 +73,26 @@ class ParentNode(HTMLNode):
         return f"ParentNode({self.tag}, {self.props}, {self.value}, {self.children})"
 
     def to_html(self):
-        if not isinstance(self.children, t.Union[list, tuple, LeafNode, ParentNode]):
-            raise ValueError("ParentNode must have children")
-        if not self.tag:
-            raise ValueError("ParentNode must have a tag")
-
-        tagstart = f"<{self.tag}{self.props_to_html()}>"
-        text = ""
-        tagend = f"</{self.tag}>"
-
-        for child in self.children:
-            text += child.to_html()
-
-        return tagstart + text + tagend
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> t.Iterator[str]:
+        # walk the tree with an explicit stack instead of recursing, closing tags are
+        # pushed as plain strings so every chunk is yielded exactly once, in order.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif isinstance(node, ParentNode):
+                if not isinstance(node.children, t.Union[list, tuple, LeafNode, ParentNode]):
+                    raise ValueError("ParentNode must have children")
+                if not node.tag:
+                    raise ValueError("ParentNode must have a tag")
+
+                yield f"<{node.tag}{node.props_to_html()}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+            elif isinstance(node, LeafNode):
+                yield node.to_html()
+            else:
+                yield from node.iter_html()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from main import generate_path_recursive
+
+# shared fixtures for the tests, not a test module itself (discovery only picks up test*.py)
+
+
+class TempDirTestCase(unittest.TestCase):
+    # every test gets its own temporary directory, `write` creates the parent directories
+    # and takes text or bytes
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, *parts) -> str:
+        return os.path.join(self.tmp.name, *parts)
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+
+    def read(self, path) -> str:
+        with open(path, "r") as f:
+            return f.read()
+
+
+class SiteTestCase(TempDirTestCase):
+    # a small site to build: `sources` ({path relative to content/: markdown}) in content/,
+    # the template and static/ for the pages to go to
+    template_text = "{{ content }}"
+    sources = {}
+
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.dest = self.path("static")
+        self.template = self.path("template.html")
+        os.makedirs(self.content)
+        self.write(self.template, self.template_text)
+        for rel, text in self.sources.items():
+            self.write(os.path.join(self.content, rel), text)
+
+    def build(self, **kwargs) -> str:
+        # a full build of the site into `dest`, returns what it printed
+        out = StringIO()
+        with redirect_stdout(out):
+            generate_path_recursive(self.content, self.template, self.dest, **kwargs)
+        return out.getvalue()
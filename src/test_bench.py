@@ -0,0 +1,26 @@
+import unittest
+
+from bench import CORPORA, compare
+from src.utils.markdown import markdown_to_html
+
+
+class TestBench(unittest.TestCase):
+    # every corpus has to go through the whole pipeline
+    def test_corpora_render(self):
+        for name, make in CORPORA.items():
+            with self.subTest(corpus=name):
+                for page in make(1)[:3]:
+                    self.assertTrue(markdown_to_html(page).to_html().startswith("<div><h1>"))
+
+    def test_compare(self):
+        baseline = {"lists": {"tree": {"seconds": 1.0}, "total": {"seconds": 1.0}}}
+        results = {"lists": {"tree": {"seconds": 1.05}, "total": {"seconds": 1.5}}, "other": {"tree": {"seconds": 9.0}}}
+
+        regressions = compare(results, baseline, threshold=0.1)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("lists/total: +50.0%"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import json
+import unittest
+
+from src.sitetest import TempDirTestCase
+from src.utils.blockcache import BLOCK_CACHE, BlockCache, block_key
+from src.utils.markdown import markdown_to_html
+from src.utils.render import render_markdown
+
+FOOTER = "Licensed under **CC BY 4.0**, see [the license](/license)."
+
+
+class TestBlockCache(TempDirTestCase):
+    def test_hits_and_misses(self):
+        cache = BlockCache()
+        key = block_key("paragraph", "hello")
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<p>hello</p>")
+
+        self.assertEqual(cache.get(key), "<p>hello</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    # the same text is a different block once it's classified differently
+    def test_key_has_the_type(self):
+        self.assertNotEqual(block_key("paragraph", "| a |"), block_key("table", "| a |"))
+
+    def test_lru_eviction(self):
+        cache = BlockCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.evictions, 1)
+
+    def test_max_bytes(self):
+        cache = BlockCache(max_bytes=10)
+        cache.put("a", "x" * 6)
+        cache.put("b", "y" * 6)
+
+        self.assertEqual(list(cache.entries), ["b"])
+        self.assertEqual(cache.size, 6)
+
+    def test_save_and_load(self):
+        path = self.path("blocks.json")
+        cache = BlockCache()
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.save(path)
+
+        loaded = BlockCache()
+        loaded.load(path)
+        self.assertEqual(loaded.entries, cache.entries)
+        self.assertEqual(loaded.snapshot()["added"], {})
+
+        # a cache from another version of the generator is thrown away
+        self.write(path, json.dumps({"version": "old", "entries": [["a", "1"]]}))
+        stale = BlockCache()
+        stale.load(path)
+        self.assertEqual(len(stale.entries), 0)
+
+    def test_load_missing(self):
+        cache = BlockCache()
+        cache.load("/nonexistent/blocks.json")
+
+        self.assertEqual(len(cache.entries), 0)
+
+    # what the pool workers send back
+    def test_snapshot_and_merge(self):
+        worker = BlockCache()
+        worker.put("a", "1")
+        worker.get("a")
+        worker.get("b")
+        parent = BlockCache()
+        parent.merge(worker.snapshot())
+
+        self.assertEqual(dict(parent.entries), {"a": "1"})
+        self.assertEqual((parent.hits, parent.misses), (1, 1))
+        self.assertEqual(worker.snapshot(), {"added": {}, "hits": 0, "misses": 0})
+
+
+class TestCachedRendering(unittest.TestCase):
+    def setUp(self):
+        BLOCK_CACHE.clear()
+        BLOCK_CACHE.enabled = True
+        self.addCleanup(setattr, BLOCK_CACHE, "enabled", False)
+        self.addCleanup(BLOCK_CACHE.clear)
+
+    # the footer is rendered once and reused on the other pages
+    def test_repeated_blocks(self):
+        pages = [f"# Page {i}\n\n{FOOTER}\n" for i in range(3)]
+        html = [render_markdown(page) for page in pages]
+
+        self.assertEqual(BLOCK_CACHE.hits, 2)
+        self.assertEqual(BLOCK_CACHE.misses, 4)
+        BLOCK_CACHE.enabled = False
+        self.assertEqual(html, [render_markdown(page) for page in pages])
+
+    def test_tree(self):
+        page = f"# Title\n\n{FOOTER}\n"
+        tree = markdown_to_html(page)
+        # a miss is serialized once for the cache, the tree gets that html too
+        self.assertEqual([node.tag for node in tree.children], [None, None])
+        first = tree.to_html()
+        second = markdown_to_html(page).to_html()
+
+        self.assertEqual(first, second)
+        self.assertEqual(first, render_markdown(page))
+        self.assertEqual(BLOCK_CACHE.hits, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import gzip
+import os
+import unittest
+
+from src.sitetest import TempDirTestCase
+from src.utils.compress import compress_file, precompress
+from src.utils.sync import sync_tree
+
+
+class TestPrecompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.path("public")
+        self.write(os.path.join(self.root, "index.html"), "<p>hello</p>" * 100)
+        self.write(os.path.join(self.root, "styles.css"), "body { color: red; }")
+        self.write(os.path.join(self.root, "images", "logo.png"), "not text")
+
+    def test_precompress(self):
+        written = precompress(self.root)
+
+        gz = os.path.join(self.root, "index.html.gz")
+        self.assertIn(gz, written)
+        self.assertIn(os.path.join(self.root, "styles.css.gz"), written)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "images", "logo.png.gz")))
+        with gzip.open(gz, "rb") as f:
+            self.assertEqual(f.read(), b"<p>hello</p>" * 100)
+
+    # up to date variants are left alone
+    def test_skip_fresh(self):
+        precompress(self.root)
+
+        self.assertEqual(precompress(self.root), [])
+
+    def test_recompress_changed(self):
+        precompress(self.root)
+        path = os.path.join(self.root, "styles.css")
+        self.write(path, "body { color: blue; }")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        self.assertEqual(compress_file(path)[0], path + ".gz")
+        with gzip.open(path + ".gz", "rb") as f:
+            self.assertEqual(f.read(), b"body { color: blue; }")
+
+    # syncing the output again shouldn't throw the variants away
+    def test_sync_keeps_variants(self):
+        src = self.path("static")
+        sync_tree(self.root, src)
+        precompress(self.root)
+        stats = sync_tree(src, self.root, keep_suffixes=(".gz", ".br"))
+
+        self.assertEqual(stats.removed, [])
+        os.remove(os.path.join(src, "styles.css"))
+        stats = sync_tree(src, self.root, keep_suffixes=(".gz", ".br"))
+        self.assertIn(os.path.join(self.root, "styles.css.gz"), stats.removed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import unittest
+
+from src.sitetest import TempDirTestCase
+from src.utils.crawl import DEFAULT_EXCLUDE, PathFilter, crawl, parse_ignore
+
+
+class TestCrawl(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.path()
+        for rel in [
+            "index.md",
+            ".index.md.swp",
+            "notes~",
+            "blog/post.md",
+            "blog/draft.md",
+            "blog/.git/HEAD",
+            "blog/images/cover.png",
+            "docs/api.md",
+        ]:
+            self.write(rel, "x" * len(rel))
+
+    def write(self, rel, text):
+        super().write(os.path.join(self.root, rel), text)
+
+    def crawl(self, **kwargs):
+        return [entry.rel for entry in crawl(self.root, **kwargs)]
+
+    # directories come right before their contents, sorted, and the noise is left out
+    def test_order_and_defaults(self):
+        self.assertEqual(
+            self.crawl(),
+            ["blog", "blog/draft.md", "blog/images", "blog/images/cover.png", "blog/post.md", "docs", "docs/api.md", "index.md"],
+        )
+
+    def test_include_and_exclude(self):
+        self.assertEqual(
+            self.crawl(include=["*.md"], exclude=DEFAULT_EXCLUDE + ("docs/", "draft.*")),
+            ["blog", "blog/images", "blog/post.md", "index.md"],
+        )
+
+    # ignore files apply to their own directory and below, `!` takes things back
+    def test_ignore_files(self):
+        self.write(".gitignore", "images/\n*.md\n!post.md\n")
+        self.write("docs/.ssgignore", "# nothing but a comment\n")
+
+        self.assertEqual(self.crawl(), ["blog", "blog/post.md", "docs"])
+
+    def test_stat(self):
+        entries = {entry.rel: entry for entry in crawl(self.root, stat=True)}
+
+        st = os.stat(os.path.join(self.root, "blog", "post.md"))
+        self.assertEqual(entries["blog/post.md"].size, st.st_size)
+        self.assertEqual(entries["blog/post.md"].mtime_ns, st.st_mtime_ns)
+
+    def test_subdir(self):
+        self.write(".gitignore", "draft.md\n")
+
+        self.assertEqual(self.crawl(subdir="blog"), ["blog/images", "blog/images/cover.png", "blog/post.md"])
+
+    def test_missing_root(self):
+        self.assertEqual(self.crawl(subdir="nope"), [])
+
+
+class TestPathFilter(TempDirTestCase):
+    def test_patterns(self):
+        rules = parse_ignore(["/build", "**/cache/*.tmp", "a?c", "[!x]y"])
+
+        def matches(rel):
+            return any(rule.matches(rel, False) for rule in rules)
+
+        self.assertTrue(matches("build"))
+        self.assertFalse(matches("src/build"))
+        self.assertTrue(matches("cache/x.tmp"))
+        self.assertTrue(matches("deep/down/cache/x.tmp"))
+        self.assertFalse(matches("cache/sub/x.tmp"))
+        self.assertTrue(matches("abc"))
+        self.assertFalse(matches("a/c"))
+        self.assertTrue(matches("zy"))
+        self.assertFalse(matches("xy"))
+
+    # watch mode asks about single paths, anything inside an ignored directory is out too
+    def test_allows(self):
+        path_filter = PathFilter(self.path(), exclude=["drafts/"])
+
+        self.assertTrue(path_filter.allows(self.path("blog", "post.md")))
+        self.assertFalse(path_filter.allows(self.path("drafts", "post.md")))
+        self.assertFalse(path_filter.allows(self.path("..", "elsewhere.md")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import unittest
+
+from src.sitetest import TempDirTestCase
+from src.utils.depgraph import DependencyGraph, dependency_state, link_dependencies
+
+
+class TestLinkDependencies(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.dest = self.path("static")
+        for path in ["content/index.md", "content/blog/index.md", "content/blog/post.md", "static/images/logo.png"]:
+            self.write(self.path(path), "")
+
+    def resolve(self, urls, output="blog/index.html"):
+        return link_dependencies(urls, os.path.join(self.dest, output), self.content, self.dest)
+
+    def test_pages_and_assets(self):
+        dependencies, broken = self.resolve(["/", "/blog", "post.html", "/images/logo.png"])
+
+        self.assertEqual(
+            dependencies,
+            {
+                os.path.join(self.content, "index.md"): "page",
+                os.path.join(self.content, "blog", "index.md"): "page",
+                os.path.join(self.content, "blog", "post.md"): "page",
+                os.path.join(self.dest, "images", "logo.png"): "asset",
+            },
+        )
+        self.assertEqual(broken, [])
+
+    # external links and anchors aren't dependencies
+    def test_external(self):
+        self.assertEqual(self.resolve(["https://boot.dev", "//cdn.example.com/x.js", "#top", "mailto:a@b.c"]), ({}, []))
+
+    # a broken link depends on everything that would fix it
+    def test_broken(self):
+        dependencies, broken = self.resolve(["/docs"])
+
+        self.assertEqual(broken, ["/docs"])
+        self.assertEqual(
+            dependencies,
+            {
+                os.path.join(self.content, "docs.md"): "page",
+                os.path.join(self.content, "docs", "index.md"): "page",
+                os.path.join(self.dest, "docs"): "asset",
+            },
+        )
+
+    def test_state(self):
+        self.assertEqual(dependency_state("asset", os.path.join(self.dest, "images", "logo.png")), "present")
+        self.assertEqual(dependency_state("page", os.path.join(self.content, "nope.md")), "missing")
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_affected(self):
+        graph = DependencyGraph(
+            {
+                "content/a.md": {"dependencies": {"template.html": ["template", "x"], "static/images/a.png": ["asset", "present"]}},
+                "content/b.md": {"dependencies": {"template.html": ["template", "x"], "content/a.md": ["page", "present"]}},
+                "content/c.md": {},
+            }
+        )
+
+        self.assertEqual(graph.affected(["template.html"]), {"content/a.md", "content/b.md"})
+        self.assertEqual(graph.affected(["content/a.md"]), {"content/b.md"})
+        self.assertEqual(graph.affected(["static/images"]), {"content/a.md"})
+        self.assertEqual(graph.affected(["static", "content"]), {"content/a.md", "content/b.md"})
+        self.assertEqual(graph.affected(["./static/images/a.png"]), {"content/a.md"})
+        self.assertEqual(graph.affected(["static/other.css"]), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
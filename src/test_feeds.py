@@ -0,0 +1,111 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+
+from main import generate_feeds
+from src.sitetest import SiteTestCase
+from src.utils.feeds import atom_feed, rss_feed, sitemap_xml
+from src.utils.manifest import MANIFEST_NAME, BuildManifest
+from src.utils.pageindex import PageEntry, PageIndex, page_url, parse_date
+
+
+class TestPageIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = PageIndex(
+            [
+                PageEntry("/blog/second.html", "Second & last", parse_date("2024-06-01"), 20, "more <b>"),
+                PageEntry("/", "Home", None, 10, "hello"),
+                PageEntry("/blog/first.html", "First", parse_date("2024-05-01T12:30:00+02:00"), 30, "first"),
+            ]
+        )
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join("static", "index.html"), "static"), "/")
+        self.assertEqual(page_url(os.path.join("static", "blog", "index.html"), "static"), "/blog/")
+        self.assertEqual(page_url(os.path.join("static", "blog", "post.html"), "static"), "/blog/post.html")
+
+    def test_parse_date(self):
+        self.assertEqual(parse_date("2024-05-01"), datetime(2024, 5, 1, tzinfo=timezone.utc))
+        self.assertIsNone(parse_date("someday"))
+        self.assertIsNone(parse_date(True))
+
+    def test_recent(self):
+        self.assertEqual([page.url for page in self.index.recent(5)], ["/blog/second.html", "/blog/first.html"])
+        self.assertEqual([page.url for page in self.index.recent(1)], ["/blog/second.html"])
+
+    def test_sitemap(self):
+        self.assertEqual(
+            sitemap_xml(self.index, "https://example.com/"),
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            "<url><loc>https://example.com/</loc></url>\n"
+            "<url><loc>https://example.com/blog/first.html</loc><lastmod>2024-05-01</lastmod></url>\n"
+            "<url><loc>https://example.com/blog/second.html</loc><lastmod>2024-06-01</lastmod></url>\n"
+            "</urlset>\n",
+        )
+
+    # titles and summaries are escaped, the channel is named after the home page
+    def test_rss(self):
+        feed = rss_feed(self.index, "https://example.com")
+
+        self.assertIn("<title>Home</title>", feed)
+        self.assertIn("<item><title>Second &amp; last</title><link>https://example.com/blog/second.html</link>", feed)
+        self.assertIn("<pubDate>Sat, 01 Jun 2024 00:00:00 +0000</pubDate><description>more &lt;b&gt;</description>", feed)
+        self.assertNotIn("<item><title>Home", feed)
+
+    def test_atom(self):
+        feed = atom_feed(self.index, "https://example.com", title="Blog")
+
+        self.assertIn("<title>Blog</title>", feed)
+        self.assertIn("<author><name>Blog</name></author>", feed)
+        self.assertIn("<updated>2024-06-01T00:00:00+00:00</updated>", feed)
+        self.assertIn("<updated>2024-05-01T12:30:00+02:00</updated>", feed)
+        self.assertEqual(feed.count("<entry>"), 2)
+
+        feed = atom_feed(self.index, "https://example.com", author="Jo & co")
+        self.assertIn("<title>Home</title>", feed)
+        self.assertIn("<author><name>Jo &amp; co</name></author>", feed)
+
+
+class TestGenerateFeeds(SiteTestCase):
+    sources = {
+        "index.md": "# Home\n\nwelcome to the [blog](/blog)\n",
+        "blog/post.md": "---\ndate: 2024-05-01\n---\n# Post\n\nthe **first** post\nof many\n\nmore\n",
+    }
+
+    def build(self):
+        super().build()
+        with redirect_stdout(StringIO()):
+            return generate_feeds(self.dest, "https://example.com")
+
+    # the index comes out of the render pass and the manifest, the sources aren't read for it
+    def test_feeds(self):
+        written = self.build()
+
+        self.assertEqual(sorted(os.path.basename(path) for path in written), ["atom.xml", "feed.xml", "sitemap.xml"])
+        index = PageIndex.from_manifest(BuildManifest.load(os.path.join(self.dest, MANIFEST_NAME)), self.dest)
+        post = index.find("/blog/post.html")
+        self.assertEqual((post.title, post.summary), ("Post", "the first post of many"))
+        self.assertEqual(post.size, len(self.read(os.path.join(self.dest, "blog", "post.html"))))
+        self.assertIn("<description>the first post of many</description>", self.read(os.path.join(self.dest, "feed.xml")))
+
+        # nothing changed, nothing is rewritten
+        self.assertEqual(self.build(), [])
+
+    # an edit only needs its own page rendered, the other entries come from the manifest
+    def test_incremental(self):
+        self.build()
+        self.write(os.path.join(self.content, "blog", "post.md"), "---\ndate: 2024-05-02\n---\n# Renamed\n\ntext\n")
+        written = self.build()
+
+        self.assertEqual(len(written), 3)
+        sitemap = self.read(os.path.join(self.dest, "sitemap.xml"))
+        self.assertIn("<url><loc>https://example.com/</loc></url>", sitemap)
+        self.assertIn("<lastmod>2024-05-02</lastmod>", sitemap)
+        self.assertIn("<title>Renamed</title>", self.read(os.path.join(self.dest, "atom.xml")))
+
+
+if __name__ == "__main__":
+    unittest.main()
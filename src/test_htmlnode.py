@@ -1,4 +1,5 @@
 import unittest
+from io import StringIO
 
 from src.htmlnode import HTMLNode, LeafNode, ParentNode
 
@@ -12,6 +13,18 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode("h1")
         self.assertEqual(node.props_to_html(), "")
 
+    # nodes are slotted, none of them should carry a __dict__
+    def test_slots(self):
+        for node in [HTMLNode("p"), LeafNode("b", "bold"), ParentNode("p", children=[])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_eq(self):
+        self.assertEqual(LeafNode("b", "bold", {"class": "x"}), LeafNode("b", "bold", {"class": "x"}))
+        self.assertNotEqual(LeafNode("b", "bold"), LeafNode("i", "bold"))
+        self.assertEqual(
+            ParentNode("p", children=[LeafNode("b", "bold")]), ParentNode("p", children=[LeafNode("b", "bold")])
+        )
+
 
 class TestLeafNode(unittest.TestCase):
     # we need to test two things:
@@ -68,3 +81,35 @@ class TestParentNode(unittest.TestCase):
     def test_tohtmlnull(self):
         node = ParentNode("p", children=[], props=None)
         self.assertEqual(node.to_html(), "<p></p>")
+
+    # the streamed chunks should join up to the same html
+    def test_iter_html(self):
+        node = ParentNode(
+            "div",
+            children=[
+                ParentNode("p", children=[LeafNode("b", "Bold text"), LeafNode(None, "Normal text")]),
+                LeafNode("i", "italic text"),
+            ],
+        )
+        self.assertEqual(
+            list(node.iter_html()),
+            ["<div>", "<p>", "<b>Bold text</b>", "Normal text", "</p>", "<i>italic text</i>", "</div>"],
+        )
+
+    def test_write_html(self):
+        node = ParentNode("ul", children=[ParentNode("li", children=[LeafNode(None, str(i))]) for i in range(3)])
+        fp = StringIO()
+        node.write_html(fp)
+        self.assertEqual(fp.getvalue(), "<ul><li>0</li><li>1</li><li>2</li></ul>")
+
+    # deep trees shouldn't hit the recursion limit anymore
+    def test_tohtml_deep(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("span", children=[node])
+        self.assertEqual(node.to_html(), "<span>" * 5000 + "deep" + "</span>" * 5000)
+
+    def test_tohtml_notag(self):
+        node = ParentNode(None, children=[LeafNode(None, "text")])
+        with self.assertRaises(ValueError):
+            node.to_html()
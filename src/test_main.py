@@ -0,0 +1,255 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from main import BuildError, copy_files, generate_pages, generate_path_recursive, rebuild, render_pages
+from src.sitetest import SiteTestCase
+from src.utils.blockcache import BLOCK_CACHE
+from src.utils.template import Template
+
+
+class TestParallelBuild(SiteTestCase):
+    template_text = "<title>{{ title }}</title>{{ content }}"
+    sources = {f"page{i}.md": f"# Page {i}\n\nthis is **page** {i}\n" for i in range(10)}
+
+    def setUp(self):
+        super().setUp()
+        self.pages = [
+            (os.path.join(self.content, f"page{i}.md"), os.path.join(self.content, f"page{i}.html")) for i in range(10)
+        ]
+
+    # the process pool should give the same results, in the same order
+    def test_render_pages_deterministic(self):
+        template = Template("{{ title }}|{{ content }}")
+        serial = list(render_pages(self.pages, template, jobs=1))
+        parallel = list(render_pages(self.pages, template, jobs=3))
+
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial[3][2], b"Page 3|<div><h1>Page 3</h1><p>this is <b>page</b> 3</p></div>")
+
+    # the workers' block caches end up in the parent's
+    def test_render_pages_block_cache(self):
+        template = Template("{{ title }}|{{ content }}")
+        BLOCK_CACHE.clear()
+        BLOCK_CACHE.enabled = True
+        self.addCleanup(setattr, BLOCK_CACHE, "enabled", False)
+        self.addCleanup(BLOCK_CACHE.clear)
+
+        parallel = list(render_pages(self.pages, template, jobs=3))
+
+        self.assertEqual(BLOCK_CACHE.misses, 20)
+        self.assertEqual(len(BLOCK_CACHE.entries), 20)
+        self.assertEqual(parallel, list(render_pages(self.pages, template, jobs=1)))
+        self.assertEqual(BLOCK_CACHE.hits, 20)
+
+    # one bad page shouldn't stop the rest of the build
+    def test_errors_are_aggregated(self):
+        self.write(os.path.join(self.content, "page2.md"), "no title here\n")
+        self.write(os.path.join(self.content, "page7.md"), "unclosed **bold\n")
+
+        with self.assertRaises(BuildError) as cm:
+            self.build(jobs=2)
+
+        failed = [os.path.basename(source) for source, _ in cm.exception.errors]
+        self.assertEqual(failed, ["page2.md", "page7.md"])
+        self.assertEqual(
+            self.read(os.path.join(self.dest, "page5.html")),
+            "<title>Page 5</title><div><h1>Page 5</h1><p>this is <b>page</b> 5</p></div>",
+        )
+
+
+class TestGeneratePages(SiteTestCase):
+    sources = {"index.md": "# Home\n", "blog/post.md": "# Post\n"}
+
+    def setUp(self):
+        super().setUp()
+        self.build()
+
+    def generate(self, sources, changed=()):
+        with redirect_stdout(StringIO()):
+            return generate_pages(sources, self.content, self.template, self.dest, changed=changed)
+
+    def test_single_page(self):
+        source = os.path.join(self.content, "index.md")
+        self.write(source, "# Home\n\nedited\n")
+
+        self.assertEqual(self.generate([source]), [os.path.join(self.dest, "index.html")])
+
+    # an untouched page is left alone even if it's passed in
+    def test_unchanged(self):
+        self.assertEqual(self.generate([os.path.join(self.content, "index.md")]), [])
+
+    # what if a whole directory was removed?
+    def test_deleted_dir(self):
+        blog = os.path.join(self.content, "blog")
+        os.remove(os.path.join(blog, "post.md"))
+        os.rmdir(blog)
+        output = os.path.join(self.dest, "blog", "post.html")
+
+        self.assertEqual(self.generate([blog]), [output])
+        self.assertFalse(os.path.exists(output))
+
+    def test_new_dir(self):
+        docs = os.path.join(self.content, "docs")
+        os.makedirs(docs)
+        self.write(os.path.join(docs, "index.md"), "# Docs\n")
+
+        self.assertEqual(self.generate([docs]), [os.path.join(self.dest, "docs", "index.html")])
+
+    # editors write swap files next to the pages, those aren't pages
+    def test_swap_file(self):
+        swap = os.path.join(self.content, ".index.md.swp")
+        self.write(swap, "binary junk")
+
+        self.assertEqual(self.generate([swap]), [])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, ".index.html.swp")))
+
+    # the template is a dependency of every page
+    def test_changed_template(self):
+        self.write(self.template, "<main>{{ content }}</main>")
+
+        self.assertEqual(
+            sorted(self.generate([], changed=[self.template])),
+            [os.path.join(self.dest, "blog", "post.html"), os.path.join(self.dest, "index.html")],
+        )
+
+    # a page with a broken link is rebuilt once the page it links to shows up,
+    # the others are left alone
+    def test_linked_page_added(self):
+        index = os.path.join(self.content, "index.md")
+        self.write(index, "# Home\n\nsee the [docs](/docs)\n")
+        self.generate([index])
+        docs = os.path.join(self.content, "docs.md")
+        self.write(docs, "# Docs\n")
+
+        def explain():
+            out = StringIO()
+            with redirect_stdout(out):
+                generate_pages([docs], self.content, self.template, self.dest, changed=[docs], explain=True)
+            return out.getvalue()
+
+        # the linking page renders to the same html, so it's rebuilt but not rewritten
+        self.assertIn(f"Building {index}: linked page {docs} was added", explain())
+        # an edit that doesn't add or remove it doesn't matter to the linking page
+        self.write(docs, "# Docs\n\nmore\n")
+        self.assertNotIn(f"Building {index}", explain())
+
+    # the pages outside the include globs aren't deleted sources, they stay, also after the sync
+    def test_include_keeps_other_pages(self):
+        public = self.path("public")
+        with redirect_stdout(StringIO()):
+            copy_files(self.dest, public)
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nedited\n")
+        self.build(include=["blog/**"])
+        with redirect_stdout(StringIO()):
+            copy_files(self.dest, public)
+
+        for directory in (self.dest, public):
+            self.assertTrue(os.path.exists(os.path.join(directory, "index.html")))
+            self.assertIn("edited", self.read(os.path.join(directory, "blog", "post.html")))
+
+    def test_explain(self):
+        source = os.path.join(self.content, "index.md")
+        self.write(source, "# Home\n\nedited\n")
+        out = StringIO()
+        with redirect_stdout(out):
+            generate_pages([source], self.content, self.template, self.dest, explain=True)
+
+        self.assertIn(f"Building {source}: source changed", out.getvalue())
+
+
+
+class TestDirectBuild(SiteTestCase):
+    sources = {"index.md": "# Home\n\n![logo](/images/logo.png)\n"}
+
+    def setUp(self):
+        super().setUp()
+        # static/ only has the assets here, the pages go to public/
+        self.static = self.dest
+        self.public = self.path("public")
+        self.manifest = self.path(".manifest.json")
+        self.write(os.path.join(self.static, "images", "logo.png"), "png bytes")
+        # left over from a staged build
+        self.write(os.path.join(self.static, "index.html"), "stale")
+
+    def build(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            outputs = generate_path_recursive(
+                self.content, self.template, self.public, manifest_path=self.manifest, static_path=self.static
+            )
+            copy_files(self.static, self.public, owned=[os.path.relpath(path, self.public) for path in outputs])
+        return out.getvalue()
+
+    # the pages go straight to the output, the sync only brings the assets and leaves the pages alone
+    def test_build(self):
+        out = self.build()
+        index = os.path.join(self.public, "index.html")
+
+        self.assertNotIn("broken", out)
+        self.assertIn("<h1>Home</h1>", self.read(index))
+        self.assertEqual(self.read(os.path.join(self.public, "images", "logo.png")), "png bytes")
+        self.assertFalse(os.path.exists(os.path.join(self.public, ".manifest.json")))
+        self.assertTrue(os.path.exists(self.manifest))
+
+        # a second build has nothing to do
+        self.build()
+        self.assertIn("<h1>Home</h1>", self.read(index))
+
+    def test_removed_page(self):
+        about = os.path.join(self.content, "about.md")
+        self.write(about, "# About\n")
+        self.build()
+        os.remove(about)
+        self.build()
+
+        self.assertFalse(os.path.exists(os.path.join(self.public, "about.html")))
+
+
+
+class TestRebuild(SiteTestCase):
+    # watch mode, run from the site's directory like `main` is
+    sources = {"index.md": "# Home\n\n[about](/about.html)\n", "about.md": "# About\n"}
+
+    def setUp(self):
+        super().setUp()
+        cwd = os.getcwd()
+        os.chdir(self.path())
+        self.addCleanup(os.chdir, cwd)
+        self.content, self.template, self.dest = "content", "template.html", "static"
+        self.build()
+        with redirect_stdout(StringIO()):
+            copy_files("static", "public")
+
+    def rebuild(self, changes):
+        out = StringIO()
+        with redirect_stdout(out):
+            rebuild(changes)
+        return out.getvalue()
+
+    def test_edit(self):
+        self.write(os.path.join("content", "about.md"), "# About us\n")
+        out = self.rebuild({os.path.join("content", "about.md")})
+
+        self.assertIn("Rebuilt 1 change(s)", out)
+        self.assertIn("<h1>About us</h1>", self.read(os.path.join("public", "about.html")))
+
+    # one broken page doesn't keep the good ones from being published
+    def test_error(self):
+        self.write(os.path.join("content", "about.md"), "# About us\n")
+        self.write(os.path.join("content", "broken.md"), "no title\n")
+        out = self.rebuild({os.path.join("content", "about.md"), os.path.join("content", "broken.md")})
+
+        self.assertIn("1 page(s) failed to build", out)
+        self.assertIn("<h1>About us</h1>", self.read(os.path.join("public", "about.html")))
+
+    # the pages the rebuild wrote come back from the watcher, they mustn't trigger another one
+    def test_own_writes(self):
+        changes = {os.path.join("static", "about.html"), os.path.join("static", ".about.html.123.tmp")}
+
+        self.assertEqual(self.rebuild(changes), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
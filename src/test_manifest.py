@@ -0,0 +1,162 @@
+import os
+import unittest
+
+from src.sitetest import SiteTestCase, TempDirTestCase
+from src.utils.manifest import MANIFEST_NAME, BuildManifest
+from src.utils.pageindex import PageIndex, parse_date
+
+
+class TestBuildManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = self.path(MANIFEST_NAME)
+        self.output = self.path("index.html")
+        self.write(self.output, "")
+
+    def no_state(self, kind, path):
+        raise AssertionError(f"no dependency {path} was recorded")
+
+    def test_roundtrip(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("content/index.md", "a", "b", self.output, {})
+        manifest.save()
+
+        loaded = BuildManifest.load(self.manifest_path)
+        self.assertIsNone(loaded.stale_reason("content/index.md", "a", "b", self.output, self.no_state))
+
+    # what if the output got deleted behind our back?
+    def test_stale_missing_output(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("content/index.md", "a", "b", self.output, {})
+        os.remove(self.output)
+
+        self.assertEqual(
+            manifest.stale_reason("content/index.md", "a", "b", self.output, self.no_state), "output missing"
+        )
+
+    # an entry from before dependencies were recorded is always rebuilt
+    def test_stale_no_dependencies(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("content/index.md", "a", "b", self.output)
+
+        self.assertEqual(
+            manifest.stale_reason("content/index.md", "a", "b", self.output, self.no_state),
+            "no dependencies recorded",
+        )
+
+    # what if there's no manifest or it's broken?
+    def test_load_broken(self):
+        self.write(self.manifest_path, "{not json")
+
+        self.assertEqual(BuildManifest.load(self.manifest_path).entries, {})
+
+    def test_stale_reason(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("content/index.md", "a", "b", self.output, {"content/blog.md": ["page", "missing"]})
+        states = {"content/blog.md": "missing"}
+
+        def state(kind, path):
+            return states[path]
+
+        self.assertIsNone(manifest.stale_reason("content/index.md", "a", "b", self.output, state))
+        self.assertEqual(manifest.stale_reason("content/other.md", "a", "b", self.output, state), "new page")
+        self.assertEqual(manifest.stale_reason("content/index.md", "x", "b", self.output, state), "source changed")
+        self.assertEqual(manifest.stale_reason("content/index.md", "a", "x", self.output, state), "template changed")
+        states["content/blog.md"] = "present"
+        self.assertEqual(
+            manifest.stale_reason("content/index.md", "a", "b", self.output, state),
+            "linked page content/blog.md was added",
+        )
+
+    # the hash is only trusted while the size and mtime are the ones it was taken with
+    def test_known_hash(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("content/index.md", "a", "b", self.output, size=10, mtime_ns=123)
+
+        self.assertEqual(manifest.known_hash("content/index.md", 10, 123), "a")
+        self.assertIsNone(manifest.known_hash("content/index.md", 10, 124))
+        self.assertIsNone(manifest.known_hash("content/index.md", 11, 123))
+        self.assertIsNone(manifest.known_hash("content/other.md", 10, 123))
+
+    def test_orphans(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("a.md", "a", "b", "a.html")
+        manifest.record("b.md", "a", "b", "b.html")
+
+        self.assertEqual([source for source, _ in manifest.orphans(["a.md"])], ["b.md"])
+
+
+class TestIncrementalBuild(SiteTestCase):
+    template_text = "<title>{{ title }}</title>{{ content }}"
+    sources = {"index.md": "# Home\n\nhello\n", "blog/index.md": "# Blog\n\nposts\n"}
+
+    def page_index(self):
+        return PageIndex.from_manifest(BuildManifest.load(os.path.join(self.dest, MANIFEST_NAME)), self.dest)
+
+    # only the edited page should be rendered again
+    def test_skips_unchanged(self):
+        self.build()
+        home = os.path.join(self.dest, "index.html")
+        blog = os.path.join(self.dest, "blog", "index.html")
+        self.write(home, "untouched")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nnew post\n")
+        self.build()
+
+        self.assertEqual(self.read(home), "untouched")
+        self.assertEqual(self.read(blog), "<title>Blog</title><div><h1>Blog</h1><p>new post</p></div>")
+
+    # a template change invalidates everything
+    def test_template_change(self):
+        self.build()
+        self.write(self.template, "<h1>{{ title }}</h1>")
+        self.build()
+
+        self.assertEqual(self.read(os.path.join(self.dest, "index.html")), "<h1>Home</h1>")
+        self.assertEqual(self.read(os.path.join(self.dest, "blog", "index.html")), "<h1>Blog</h1>")
+
+    def test_deleted_source(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        self.build()
+
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    # every front matter key gets a template slot, and the page can pick its own template
+    def test_front_matter(self):
+        self.write(self.path("post.html"), "<title>{{ title }}</title>{{ date }}|{{ content }}")
+        self.write(
+            os.path.join(self.content, "blog", "index.md"),
+            "---\ntitle: \"Blog: all posts\"\ndate: 2024-05-01\ntemplate: post.html\n---\n# Blog\n\nposts\n",
+        )
+        self.build()
+
+        self.assertEqual(
+            self.read(os.path.join(self.dest, "blog", "index.html")),
+            "<title>Blog: all posts</title>2024-05-01|<div><h1>Blog</h1><p>posts</p></div>",
+        )
+        # the page index comes out of the manifest, the sources aren't read again
+        index = self.page_index()
+        self.assertEqual(index.find("/").title, "Home")
+        self.assertEqual(index.find("/blog/").title, "Blog: all posts")
+        self.assertEqual(index.find("/blog/").date, parse_date("2024-05-01"))
+
+    def test_draft(self):
+        source = os.path.join(self.content, "blog", "index.md")
+        output = os.path.join(self.dest, "blog", "index.html")
+        self.build()
+        self.write(source, "+++\ndraft = true\n+++\n# Blog\n\nnot yet\n")
+        self.build()
+
+        self.assertFalse(os.path.exists(output))
+        self.assertIsNone(self.page_index().find("/blog/"))
+
+        self.build(drafts=True)
+        self.assertEqual(self.read(output), "<title>Blog</title><div><h1>Blog</h1><p>not yet</p></div>")
+        self.assertEqual(self.page_index().find("/blog/").source, source)
+        self.build()
+        self.assertFalse(os.path.exists(output))
+
+
+if __name__ == "__main__":
+    unittest.main()
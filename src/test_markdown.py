@@ -1,12 +1,20 @@
 import unittest
+from io import StringIO
+from unittest import mock
 
+from src.enums import MarkdownBlockTypes
 from src.htmlnode import HTMLNode, LeafNode, ParentNode
+from src.utils import markdown
 from src.utils.markdown import (
     block_to_block_type,
     extract_markdown_images,
     extract_markdown_links,
+    iter_blocks,
+    iter_lines,
+    iter_markdown_images_and_links,
     markdown_to_blocks,
     markdown_to_html,
+    register_block_type,
 )
 
 
@@ -25,6 +33,17 @@ class TestMarkdown(unittest.TestCase):
             [("link1", "path/to/link1"), ("link2", "path/to/link2")],
         )
 
+    # images and links in one pass, with where they are
+    def test_iter_markdown_images_and_links(self):
+        text = "a ![image](i.png) and a [link](/l)"
+
+        self.assertEqual(
+            list(iter_markdown_images_and_links(text)),
+            [("image", "image", "i.png", 2, 17), ("link", "link", "/l", 24, 34)],
+        )
+        self.assertEqual(list(iter_markdown_images_and_links(text, "link")), [("link", "link", "/l", 24, 34)])
+        self.assertEqual(list(iter_markdown_images_and_links(text, "image")), [("image", "image", "i.png", 2, 17)])
+
     def test_markdown_to_blocks(self):
         text = """# This is a heading
 
@@ -187,3 +206,100 @@ Here are some ordered items
         htmlnodes = markdown_to_html(text)
 
         self.assertEqual(htmlnodes, ParentNode("div", children=[]))
+
+    # code blocks can have blank lines in them
+    def test_markdown_to_blocks_fenced_blank_lines(self):
+        text = "# Code\n\n```\nfirst()\n\n\nsecond()\n```\n\nafter\n"
+
+        self.assertEqual(markdown_to_blocks(text), ["# Code", "```\nfirst()\n\n\nsecond()\n```", "after"])
+
+    # the last block used to get lost without a newline at the end
+    def test_markdown_to_blocks_no_trailing_newline(self):
+        self.assertEqual(markdown_to_blocks("# Title\n\nlast"), ["# Title", "last"])
+
+    def test_iter_lines(self):
+        for text in ["", "a", "a\n", "a\n\nb", "\n\n"]:
+            with self.subTest(text=text):
+                self.assertEqual(list(iter_lines(text)), text.split("\n"))
+
+    # a file yields its lines with the newline still on them
+    def test_iter_blocks_file(self):
+        fp = StringIO("# Title\n\n* one\n* two\n\n```\ncode\n\nmore\n```\n> quote\n")
+
+        self.assertEqual(
+            list(iter_blocks(fp)),
+            [
+                (MarkdownBlockTypes.HEADING, ["# Title"]),
+                (MarkdownBlockTypes.UNORDERED_LIST, ["* one", "* two"]),
+                (MarkdownBlockTypes.CODE, ["```", "code", "", "more", "```"]),
+                (MarkdownBlockTypes.QUOTE, ["> quote"]),
+            ],
+        )
+
+    # the parser only pulls lines as blocks are consumed
+    def test_iter_blocks_lazy(self):
+        def lines():
+            yield "first\n"
+            yield "\n"
+            raise AssertionError("read too far")
+
+        self.assertEqual(next(iter_blocks(lines())), (MarkdownBlockTypes.PARAGRAPH, ["first"]))
+
+    # a fence that's never closed doesn't eat the rest of the document
+    def test_iter_blocks_unclosed_fence(self):
+        self.assertEqual(
+            list(iter_blocks(iter_lines("```\ncode\n\nmore\n\n# Heading\n"))),
+            [
+                (MarkdownBlockTypes.PARAGRAPH, ["```", "code"]),
+                (MarkdownBlockTypes.PARAGRAPH, ["more"]),
+                (MarkdownBlockTypes.HEADING, ["# Heading"]),
+            ],
+        )
+
+    # backticks after the opening ones make it inline code, not a fence
+    def test_iter_blocks_not_a_fence(self):
+        self.assertEqual(
+            markdown_to_blocks("```x``` is inline\n\nNext para\n\n# Heading"),
+            ["```x``` is inline", "Next para", "# Heading"],
+        )
+
+    def test_markdown_to_html_file(self):
+        text = "# Title\n\n```\na\n\nb\n```\n"
+
+        self.assertEqual(markdown_to_html(StringIO(text)), markdown_to_html(text))
+
+    def test_block_types_by_first_character(self):
+        for block, block_type in [
+            ("###### six", MarkdownBlockTypes.HEADING),
+            ("####### seven", MarkdownBlockTypes.PARAGRAPH),
+            ("#no space", MarkdownBlockTypes.PARAGRAPH),
+            ("- a\n- b", MarkdownBlockTypes.UNORDERED_LIST),
+            ("- a\n* b", MarkdownBlockTypes.PARAGRAPH),
+            ("1. a\n3. b", MarkdownBlockTypes.PARAGRAPH),
+            ("> a\nb", MarkdownBlockTypes.PARAGRAPH),
+            ("```x```", MarkdownBlockTypes.CODE),
+        ]:
+            with self.subTest(block=block):
+                self.assertEqual(block_to_block_type(block), block_type)
+
+    # a new block type without touching the parser
+    def test_register_block_type(self):
+        def classify(lines):
+            return "table" if all(line.startswith("|") for line in lines) else None
+
+        def process(block):
+            rows = [ParentNode(tag="tr", children=[LeafNode("td", cell.strip()) for cell in line.strip("|").split("|")]) for line in block.split("\n")]
+            return ParentNode(tag="table", children=rows)
+
+        with mock.patch.dict(markdown._BLOCK_PROCESSORS), mock.patch.dict(markdown._BLOCK_CLASSIFIERS):
+            register_block_type("table", process, classify, "|")
+
+            self.assertEqual(block_to_block_type("| a | b |\n| c | d |"), "table")
+            self.assertEqual(block_to_block_type("| a | b |\nc"), MarkdownBlockTypes.PARAGRAPH)
+            self.assertEqual(
+                markdown_to_html("| a | b |\n| c | d |\n").to_html(),
+                "<div><table><tr><td>a</td><td>b</td></tr><tr><td>c</td><td>d</td></tr></table></div>",
+            )
+
+        self.assertEqual(block_to_block_type("| a | b |"), MarkdownBlockTypes.PARAGRAPH)
+
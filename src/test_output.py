@@ -0,0 +1,80 @@
+import os
+import unittest
+from unittest import mock
+
+from src.sitetest import TempDirTestCase
+from src.utils.output import OutputWriter
+
+
+class TestOutputWriter(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.path("index.html")
+
+    # nothing shows up until the commit, and no temporary files are left behind
+    def test_write_and_commit(self):
+        writer = OutputWriter(fsync=True)
+        self.assertEqual(writer.write(self.page, "<p>hï</p>"), 10)
+        self.assertFalse(os.path.exists(self.page))
+
+        self.assertEqual(writer.commit(), [self.page])
+        self.assertEqual(self.read(self.page), "<p>hï</p>")
+        self.assertEqual(os.listdir(self.path()), ["index.html"])
+
+    # the same bytes aren't written again, the mtime stays put
+    def test_unchanged(self):
+        with OutputWriter() as writer:
+            writer.write(self.page, "<p>hi</p>")
+        os.utime(self.page, ns=(1, 1))
+
+        with OutputWriter() as writer:
+            self.assertEqual(writer.write(self.page, "<p>hi</p>"), 9)
+            # same size, different bytes
+            writer.write(self.path("other.html"), "x")
+
+        self.assertEqual(writer.unchanged, [self.page])
+        self.assertEqual(writer.written, [self.path("other.html")])
+        self.assertEqual(os.stat(self.page).st_mtime_ns, 1)
+
+    # big pages are compared a chunk at a time, a difference in a later chunk still counts
+    def test_unchanged_chunks(self):
+        with OutputWriter() as writer:
+            writer.write(self.page, "a" * 10 + "b")
+
+        with mock.patch("src.utils.output.COMPARE_CHUNK_SIZE", 4), OutputWriter() as writer:
+            writer.write(self.page, "a" * 10 + "b")
+            self.assertEqual(writer.unchanged, [self.page])
+            writer.write(self.page, "a" * 10 + "c")
+            self.assertEqual(writer.pending[0][1], self.page)
+
+        self.assertEqual(self.read(self.page), "a" * 10 + "c")
+
+    def test_open(self):
+        with OutputWriter() as writer:
+            with writer.open(self.page) as f:
+                f.write("<p>")
+                f.write("hi</p>")
+        os.utime(self.page, ns=(1, 1))
+
+        with OutputWriter() as writer:
+            with writer.open(self.page) as f:
+                f.write("<p>hi</p>")
+
+        self.assertEqual(writer.unchanged, [self.page])
+        self.assertEqual(os.stat(self.page).st_mtime_ns, 1)
+
+    # a failed build leaves the old pages as they were
+    def test_abort(self):
+        self.write(self.page, "old")
+
+        with self.assertRaises(RuntimeError):
+            with OutputWriter() as writer:
+                writer.write(self.page, "new")
+                raise RuntimeError("render failed")
+
+        self.assertEqual(self.read(self.page), "old")
+        self.assertEqual(os.listdir(self.path()), ["index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from src.utils.profiling import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    # a disabled profiler shouldn't record anything
+    def test_disabled(self):
+        profiler = Profiler()
+        with profiler.stage("parse"):
+            pass
+        with profiler.page("index.md") as page:
+            self.assertIsNone(page)
+
+        self.assertEqual(profiler.totals, {})
+        self.assertEqual(profiler.pages, [])
+
+    def test_stages_and_pages(self):
+        profiler = Profiler()
+        profiler.enabled = True
+        with profiler.page("index.md") as page:
+            with profiler.stage("parse"):
+                profiler.add("inline", 0.5)
+                profiler.add("inline", 0.25)
+            page["bytes_in"] = 10
+
+        self.assertEqual(profiler.counts, {"inline": 2, "parse": 1})
+        self.assertEqual(profiler.totals["inline"], 0.75)
+        self.assertEqual(profiler.pages[0]["stages"]["inline"], 0.75)
+        self.assertEqual(profiler.pages[0]["bytes_in"], 10)
+        self.assertEqual([event["name"] for event in profiler.events], ["parse", "index.md"])
+
+    # what the pool workers send back gets added up
+    def test_merge(self):
+        worker = Profiler()
+        worker.enabled = True
+        with worker.page("a.md"):
+            worker.add("inline", 1.0)
+        profiler = Profiler()
+        profiler.enabled = True
+        profiler.add("inline", 2.0)
+        profiler.merge(worker.snapshot())
+
+        self.assertEqual(profiler.totals["inline"], 3.0)
+        self.assertEqual(profiler.counts["inline"], 2)
+        self.assertEqual([page["path"] for page in profiler.pages], ["a.md"])
+
+    def test_slowest_pages(self):
+        profiler = Profiler()
+        profiler.pages = [{"path": path, "seconds": seconds} for path, seconds in [("a", 1), ("b", 3), ("c", 2)]]
+
+        self.assertEqual([page["path"] for page in profiler.slowest_pages(2)], ["b", "c"])
+
+    def test_chrome_trace(self):
+        profiler = Profiler()
+        profiler.enabled = True
+        with profiler.stage("build"):
+            pass
+        event = profiler.to_chrome_trace()["traceEvents"][0]
+
+        self.assertEqual((event["name"], event["ph"]), ("build", "X"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from io import StringIO
+from unittest import mock
+
+from src.enums import MarkdownBlockTypes, TextNodeTypes
+from src.htmlnode import LeafNode
+from src.textnode import TextNode
+from src.utils import htmlnode, markdown, render
+from src.utils.htmlnode import register_text_type, text_node_to_html_node
+from src.utils.markdown import markdown_to_html, register_block_type
+from src.utils.profiling import PROFILER
+from src.utils.render import register_block_renderer, render_markdown, write_markdown_html
+
+SAMPLES = [
+    "",
+    "# This is a heading\n\nThis is a paragraph with **bold** and *italic* words.\n",
+    "* one\n* two [link](https://boot.dev)\n\n- three\n- four\n",
+    "1. first `code`\n2. second ![image](/images/rivendell.png)\n",
+    "> quoted **text**\n> more quote\n",
+    "```\nprint('code')\n```\n",
+    "```\nfirst()\n\nsecond()\n```\n\nno newline at the end",
+    "###### six\n\n**bold *both* bold** and *italic*\n",
+    "paragraph\nover two lines with [a](b)[c](d)\n\nand an [aside] bracket\n",
+    "[![build](badge.svg)](job) and a [footnote] before ![x](y.png)\n",
+]
+
+
+class TestRender(unittest.TestCase):
+    # the direct renderer has to give exactly what the tree gives
+    def test_same_as_tree(self):
+        for markdown in SAMPLES:
+            with self.subTest(markdown=markdown):
+                self.assertEqual(render_markdown(markdown), markdown_to_html(markdown).to_html())
+
+    def test_write(self):
+        fp = StringIO()
+        write_markdown_html("# Hi\n\nthere\n", fp)
+
+        self.assertEqual(fp.getvalue(), "<div><h1>Hi</h1><p>there</p></div>")
+
+    def test_file(self):
+        markdown = "# Title\n\n```\na\n\nb\n```\n\ntext\n"
+
+        self.assertEqual(render_markdown(StringIO(markdown)), render_markdown(markdown))
+
+    # registered block types work in the direct renderer too, through their node or their own renderer
+    def test_registered_block_type(self):
+        with mock.patch.dict(markdown._BLOCK_PROCESSORS), mock.patch.dict(markdown._BLOCK_CLASSIFIERS), mock.patch.dict(
+            render._BLOCK_RENDERERS
+        ):
+            register_block_type("note", lambda block: LeafNode("aside", block[2:]), lambda lines: "note", "!")
+            self.assertEqual(render_markdown("! careful\n"), "<div><aside>careful</aside></div>")
+
+            register_block_renderer("note", lambda block: f"<aside class=note>{block[2:]}</aside>")
+            self.assertEqual(render_markdown("! careful\n"), "<div><aside class=note>careful</aside></div>")
+
+    def test_registered_text_type(self):
+        with mock.patch.dict(htmlnode._TEXT_NODE_CONVERTERS):
+            register_text_type("footnote", lambda node: LeafNode("sup", node.text, {"id": node.url}))
+
+            self.assertEqual(text_node_to_html_node(TextNode("1", "footnote", "fn1")).to_html(), '<sup id="fn1">1</sup>')
+
+        with self.assertRaises(ValueError):
+            text_node_to_html_node(TextNode("1", "footnote", "fn1"))
+
+    # replacing a built-in type changes both paths, the direct renderer's own markup for it is dropped
+    def test_replaced_builtin_types(self):
+        with mock.patch.dict(markdown._BLOCK_PROCESSORS), mock.patch.dict(render._BLOCK_RENDERERS), mock.patch.dict(
+            htmlnode._TEXT_NODE_CONVERTERS
+        ), mock.patch.dict(render._INLINE_WRAPPERS), mock.patch.dict(render._INLINE_RENDERERS):
+            register_block_type(MarkdownBlockTypes.CODE, lambda block: LeafNode("pre", block.strip("`"), {"class": "hl"}))
+            register_text_type(TextNodeTypes.BOLD, lambda node: LeafNode("strong", node.text))
+            text = "```\nx = 1\n```\n\nsome **bold** text\n"
+
+            expected = '<div><pre class="hl">\nx = 1\n</pre><p>some <strong>bold</strong> text</p></div>'
+            self.assertEqual(markdown_to_html(text).to_html(), expected)
+            self.assertEqual(render_markdown(text), expected)
+
+        self.assertEqual(render_markdown("**bold**"), "<div><p><b>bold</b></p></div>")
+
+    # the same stages as the node tree: blocks, inline and serialize, with the same html
+    def test_profiled(self):
+        expected = render_markdown(SAMPLES[1])
+        PROFILER.reset()
+        PROFILER.enabled = True
+        self.addCleanup(PROFILER.reset)
+        self.addCleanup(setattr, PROFILER, "enabled", False)
+
+        self.assertEqual(render_markdown(SAMPLES[1]), expected)
+        self.assertEqual(PROFILER.counts["blocks"], 1)
+        self.assertEqual(PROFILER.counts["serialize"], 2)
+        self.assertEqual(PROFILER.counts["inline"], 2)
+
+    def test_unclosed(self):
+        with self.assertRaises(ValueError):
+            render_markdown("this is **not closed\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+import asyncio
+import gzip
+import http.client
+import threading
+import unittest
+from functools import partial
+from http.server import ThreadingHTTPServer
+
+from server import (
+    LIVE_RELOAD_PATH,
+    LIVE_RELOAD_SCRIPT,
+    DevServer,
+    StaticFileHandler,
+    inject_live_reload,
+    parse_accept_encoding,
+    parse_range,
+    resolve_path,
+)
+from src.sitetest import TempDirTestCase
+
+
+class TestHelpers(unittest.TestCase):
+    def test_inject_live_reload(self):
+        html = b"<html><body><p>hi</p></body></html>"
+
+        self.assertEqual(inject_live_reload(html), b"<html><body><p>hi</p>" + LIVE_RELOAD_SCRIPT + b"</body></html>")
+
+    # what if there's no body tag?
+    def test_inject_live_reload_nobody(self):
+        self.assertEqual(inject_live_reload(b"<p>hi</p>"), b"<p>hi</p>" + LIVE_RELOAD_SCRIPT)
+
+    def test_resolve_path(self):
+        self.assertEqual(resolve_path("/srv", "/majesty/index.html"), "/srv/majesty/index.html")
+        self.assertEqual(resolve_path("/srv", "/"), "/srv/")
+        self.assertIsNone(resolve_path("/srv", "/../etc/passwd"))
+        self.assertIsNone(resolve_path("/srv", "/%2e%2e/etc/passwd"))
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(parse_accept_encoding("gzip, br;q=0.5, identity;q=0"), {"gzip": 1.0, "br": 0.5, "identity": 0.0})
+        self.assertEqual(parse_accept_encoding(None), {})
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=50-500", 100), (50, 99))
+        # multiple or broken ranges are ignored
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range("lines=0-1", 100))
+        with self.assertRaises(ValueError):
+            parse_range("bytes=100-", 100)
+
+
+class QuietStaticFileHandler(StaticFileHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestStaticFileHandler(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data = bytes(range(256)) * 40
+        self.write(self.path("image.png"), self.data)
+        self.write(self.path("index.html"), "<p>hello</p>")
+        self.write(self.path("index.html.gz"), gzip.compress(b"<p>hello</p>"))
+
+        handler = partial(QuietStaticFileHandler, directory=self.path())
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.httpd.server_close)
+        self.addCleanup(self.httpd.shutdown)
+
+    def get(self, path, headers=None, method="GET"):
+        conn = http.client.HTTPConnection("127.0.0.1", self.httpd.server_address[1])
+        conn.request(method, path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    def test_full_file(self):
+        response, body = self.get("/image.png")
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, self.data)
+        self.assertEqual(response.getheader("Accept-Ranges"), "bytes")
+        self.assertTrue(response.getheader("ETag").startswith('"'))
+
+    def test_not_modified(self):
+        response, _ = self.get("/image.png")
+        etag = response.getheader("ETag")
+
+        response, body = self.get("/image.png", {"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+
+        response, _ = self.get("/image.png", {"If-Modified-Since": response.getheader("Last-Modified")})
+        self.assertEqual(response.status, 304)
+
+    def test_range(self):
+        response, body = self.get("/image.png", {"Range": "bytes=100-199"})
+
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, self.data[100:200])
+        self.assertEqual(response.getheader("Content-Range"), f"bytes 100-199/{len(self.data)}")
+
+    # a stale If-Range means the client gets the whole new file
+    def test_if_range_mismatch(self):
+        response, body = self.get("/image.png", {"Range": "bytes=0-9", "If-Range": '"old"'})
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, self.data)
+
+    def test_range_not_satisfiable(self):
+        response, _ = self.get("/image.png", {"Range": f"bytes={len(self.data)}-"})
+
+        self.assertEqual(response.status, 416)
+
+    def test_precompressed(self):
+        response, body = self.get("/", {"Accept-Encoding": "br, gzip"})
+
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(response.getheader("Content-Type"), "text/html")
+        self.assertEqual(gzip.decompress(body), b"<p>hello</p>")
+
+    # the client doesn't accept gzip, so it gets the original
+    def test_identity(self):
+        response, body = self.get("/index.html")
+
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(body, b"<p>hello</p>")
+
+    def test_head(self):
+        response, body = self.get("/image.png", method="HEAD")
+
+        self.assertEqual(response.getheader("Content-Length"), str(len(self.data)))
+        self.assertEqual(body, b"")
+
+
+class TestDevServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.path("majesty", "index.html"), "<body>majesty</body>")
+        self.write(self.path("styles.css"), "body {}")
+
+    async def get(self, port, path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    def run_with_server(self, test):
+        async def main():
+            server = DevServer(self.path(), port=0, host="127.0.0.1")
+            await server.start()
+            task = asyncio.create_task(server.serve_forever())
+            try:
+                return await test(server)
+            finally:
+                await server.stop()
+                task.cancel()
+
+        return asyncio.run(main())
+
+    def test_html_gets_live_reload(self):
+        response = self.run_with_server(lambda server: self.get(server.port, "/majesty/"))
+
+        self.assertTrue(response.startswith(b"HTTP/1.1 200 OK"))
+        self.assertTrue(response.endswith(b"majesty" + LIVE_RELOAD_SCRIPT + b"</body>"))
+
+    def test_static_file(self):
+        response = self.run_with_server(lambda server: self.get(server.port, "/styles.css"))
+
+        self.assertIn(b"Content-Type: text/css", response)
+        self.assertTrue(response.endswith(b"\r\n\r\nbody {}"))
+
+    def test_redirect_and_missing(self):
+        async def test(server):
+            return await self.get(server.port, "/majesty"), await self.get(server.port, "/nope.html")
+
+        redirect, missing = self.run_with_server(test)
+
+        self.assertTrue(redirect.startswith(b"HTTP/1.1 301"))
+        self.assertIn(b"Location: /majesty/", redirect)
+        self.assertTrue(missing.startswith(b"HTTP/1.1 404"))
+
+    # a reload should be pushed to every connected browser
+    def test_reload_event(self):
+        async def test(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(f"GET {LIVE_RELOAD_PATH} HTTP/1.1\r\n\r\n".encode())
+            await writer.drain()
+            await reader.readuntil(b"\r\n\r\n")
+            while not server.clients:
+                await asyncio.sleep(0.01)
+            server.reload()
+            line = await asyncio.wait_for(reader.readline(), timeout=2)
+            writer.close()
+            return line
+
+        self.assertEqual(self.run_with_server(test), b"data: reload\n")
+
+    # stopping the server ends the open live-reload streams instead of leaving them hanging
+    def test_stop_closes_streams(self):
+        async def test(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(f"GET {LIVE_RELOAD_PATH} HTTP/1.1\r\n\r\n".encode())
+            await writer.drain()
+            await reader.readuntil(b"\r\n\r\n")
+            while not server.clients:
+                await asyncio.sleep(0.01)
+            await server.stop()
+            rest = await asyncio.wait_for(reader.read(), timeout=2)
+            writer.close()
+            return rest, server.clients
+
+        self.assertEqual(self.run_with_server(test), (b"", set()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+from src.sitetest import TempDirTestCase
+from src.utils.render import render_markdown
+from src.utils.source import SourceScan, iter_source_lines
+
+
+class TestSourceLines(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = self.path("page.md")
+
+    def lines(self, **kwargs):
+        return list(iter_source_lines(self.source, **kwargs))
+
+    # mapped or chunked, the lines are what `read().split("\n")` gives,
+    # even with tiny chunks that cut lines and characters in half
+    def test_same_as_split(self):
+        for text in ["", "# Title", "# Title\n", "# Tïtle\n\nsome ünicode ☃\n\n\nlast", "\n\n"]:
+            self.write(self.source, text.encode())
+            for kwargs in [{}, {"mmap_threshold": 1}, {"chunk_size": 1}, {"chunk_size": 3}]:
+                with self.subTest(text=text, **kwargs):
+                    self.assertEqual(self.lines(**kwargs), text.split("\n"))
+
+    def test_crlf(self):
+        self.write(self.source, b"# Title\r\n\r\ntext\r\n")
+
+        self.assertEqual(self.lines(), ["# Title", "", "text", ""])
+        self.assertEqual(self.lines(mmap_threshold=1), ["# Title", "", "text", ""])
+
+
+class TestSourceScan(unittest.TestCase):
+    # the title and the links come out of the same pass as the html
+    def test_scan(self):
+        markdown = "intro with a [link](/a)\n\n# Title\n\n# Not the title ![img](/b.png)\n"
+        scan = SourceScan(markdown.split("\n"))
+
+        self.assertEqual(render_markdown(scan), render_markdown(markdown))
+        self.assertEqual(scan.title, "Title")
+        self.assertEqual(scan.links, ["/a", "/b.png"])
+
+    def test_front_matter(self):
+        scan = SourceScan(
+            ["---", "title: 'Hi: there'", "draft: True", "# a comment", "", "tags: a, b", "---", "# Heading", "", "text"]
+        )
+
+        self.assertEqual(scan.meta, {"title": "Hi: there", "draft": True, "tags": "a, b"})
+        self.assertEqual(render_markdown(scan), "<div><h1>Heading</h1><p>text</p></div>")
+        self.assertEqual(scan.page_title(), "Hi: there")
+        self.assertEqual(scan.title, "Heading")
+
+    def test_toml_front_matter(self):
+        scan = SourceScan(["+++", 'date = "2024-05-01"', "+++", "text"])
+
+        self.assertEqual(scan.meta, {"date": "2024-05-01"})
+        self.assertEqual(list(scan), ["text"])
+
+    # a delimiter that's never closed isn't a header, the lines are all still there
+    def test_unclosed_front_matter(self):
+        scan = SourceScan(["---", "title: x", "# Title"])
+
+        self.assertEqual(scan.meta, {})
+        self.assertEqual(list(scan), ["---", "title: x", "# Title"])
+
+    def test_invalid_front_matter(self):
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            SourceScan(["---", "not a key value pair", "---"])
+
+    # the plain text of the first paragraph, unless the front matter has a summary
+    def test_summary(self):
+        scan = SourceScan(
+            ["# Title", "", "```", "code", "", "```", "", "* item", "", "a **bold** [link](/x)", "and more", "", "next"]
+        )
+        render_markdown(scan)
+        self.assertEqual(scan.page_summary(), "a bold link and more")
+
+        scan = SourceScan(["---", "summary: given", "---", "text"])
+        render_markdown(scan)
+        self.assertEqual(scan.page_summary(), "given")
+
+    # the blocks are the parser's, a line starting with backticks doesn't open a fence
+    # that swallows the rest of the page
+    def test_summary_after_backticks(self):
+        scan = SourceScan(["# T", "", "```x``` is inline code", "", "Second para"])
+        render_markdown(scan)
+
+        self.assertEqual(scan.page_summary(), "Second para")
+
+    def test_summary_length(self):
+        scan = SourceScan(["word " * 100])
+        render_markdown(scan)
+
+        self.assertLessEqual(len(scan.page_summary()), 201)
+        self.assertTrue(scan.page_summary().endswith("word…"))
+
+    def test_no_title(self):
+        scan = SourceScan(["## Subtitle", "", "text"])
+        list(scan)
+
+        self.assertIsNone(scan.title)
+
+
+if __name__ == "__main__":
+    unittest.main()
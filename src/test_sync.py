@@ -0,0 +1,114 @@
+import os
+import unittest
+
+from src.sitetest import TempDirTestCase
+from src.utils.sync import SyncEntry, _changed, scan_tree, sync_tree
+
+
+class TestSyncTree(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = self.path("static")
+        self.dest = self.path("public")
+        self.write(os.path.join(self.src, "index.html"), "<p>hello</p>")
+        self.write(os.path.join(self.src, "images", "logo.png"), "png bytes")
+
+    def test_initial_sync(self):
+        stats = sync_tree(self.src, self.dest)
+
+        self.assertEqual(len(stats.copied), 2)
+        self.assertEqual(self.read(os.path.join(self.dest, "images", "logo.png")), "png bytes")
+        self.assertEqual(set(scan_tree(self.src)), set(scan_tree(self.dest)))
+
+    # nothing changed, nothing should be copied
+    def test_unchanged(self):
+        sync_tree(self.src, self.dest)
+        stats = sync_tree(self.src, self.dest)
+
+        self.assertEqual(stats.copied, [])
+        self.assertEqual(stats.removed, [])
+        self.assertEqual(len(stats.skipped), 2)
+
+    # a crashed build's temporary files aren't published, and aren't deleted as orphans either
+    def test_build_temp_files(self):
+        self.write(os.path.join(self.src, ".index.html.123.tmp"), "<p>half")
+        self.write(os.path.join(self.dest, ".about.html.456.tmp"), "<p>half")
+        stats = sync_tree(self.src, self.dest)
+
+        self.assertEqual(len(stats.copied), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, ".index.html.123.tmp")))
+        self.assertEqual(stats.removed, [])
+
+    # no inode numbers (windows) doesn't make every pair of files the same one
+    def test_no_inode(self):
+        src = SyncEntry(False, 5, 2, ino=0, dev=0)
+
+        self.assertTrue(_changed("a", src, "b", SyncEntry(False, 5, 1, ino=0, dev=0), checksum=False))
+        self.assertFalse(_changed("a", src, "b", SyncEntry(False, 5, 2, ino=0, dev=0), checksum=False))
+
+    def test_changed_and_orphans(self):
+        sync_tree(self.src, self.dest)
+        self.write(os.path.join(self.src, "index.html"), "<p>hello world</p>")
+        os.remove(os.path.join(self.src, "images", "logo.png"))
+        os.rmdir(os.path.join(self.src, "images"))
+        stats = sync_tree(self.src, self.dest)
+
+        self.assertEqual(stats.copied, [os.path.join(self.dest, "index.html")])
+        self.assertEqual(self.read(os.path.join(self.dest, "index.html")), "<p>hello world</p>")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+
+    # pages rendered straight into the destination are neither removed nor overwritten
+    def test_owned(self):
+        os.makedirs(os.path.join(self.dest, "blog"))
+        self.write(os.path.join(self.dest, "index.html"), "<p>rendered</p>")
+        self.write(os.path.join(self.dest, "index.html.gz"), "gzip bytes")
+        self.write(os.path.join(self.dest, "blog", "post.html"), "<p>post</p>")
+        stats = sync_tree(self.src, self.dest, keep_suffixes=(".gz",), owned=["index.html", "blog/post.html"])
+
+        self.assertEqual(stats.copied, [os.path.join(self.dest, "images", "logo.png")])
+        self.assertEqual(stats.removed, [])
+        self.assertEqual(self.read(os.path.join(self.dest, "index.html")), "<p>rendered</p>")
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html.gz")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "post.html")))
+
+    # what if a file became a directory?
+    def test_file_to_dir(self):
+        sync_tree(self.src, self.dest)
+        os.remove(os.path.join(self.src, "index.html"))
+        os.makedirs(os.path.join(self.src, "index.html"))
+        sync_tree(self.src, self.dest)
+
+        self.assertTrue(os.path.isdir(os.path.join(self.dest, "index.html")))
+
+    # same size and mtime but different bytes, only the checksum mode notices
+    def test_checksum(self):
+        sync_tree(self.src, self.dest)
+        dest_file = os.path.join(self.dest, "index.html")
+        st = os.stat(dest_file)
+        self.write(dest_file, "<p>HELLO</p>")
+        os.utime(dest_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        self.assertEqual(sync_tree(self.src, self.dest).copied, [])
+        self.assertEqual(sync_tree(self.src, self.dest, checksum=True).copied, [dest_file])
+        self.assertEqual(self.read(dest_file), "<p>hello</p>")
+
+    def test_hardlink(self):
+        sync_tree(self.src, self.dest, method="hardlink")
+        src_file = os.path.join(self.src, "index.html")
+        dest_file = os.path.join(self.dest, "index.html")
+
+        self.assertTrue(os.path.samefile(src_file, dest_file))
+        self.assertEqual(sync_tree(self.src, self.dest, method="hardlink").copied, [])
+
+    def test_reflink(self):
+        sync_tree(self.src, self.dest, method="reflink")
+
+        self.assertEqual(self.read(os.path.join(self.dest, "index.html")), "<p>hello</p>")
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            sync_tree(self.src, self.dest, method="ftp")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import unittest
+from io import StringIO
+
+from src.htmlnode import LeafNode, ParentNode
+from src.sitetest import TempDirTestCase
+from src.utils.template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile(self):
+        template = Template("<title>{{ title }}</title><body>{{content}}</body>")
+
+        self.assertEqual(template.segments, ["<title>", "</title><body>", "</body>"])
+        self.assertEqual([name for name, _ in template.slots], ["title", "content"])
+
+    def test_render(self):
+        template = Template("<h1>{{ title }}</h1>{{ content }}<footer>{{ author }}</footer>")
+        content = ParentNode("div", children=[LeafNode("p", "hello")])
+
+        self.assertEqual(
+            template.render(title="Home", content=content, author="Tolkien"),
+            "<h1>Home</h1><div><p>hello</p></div><footer>Tolkien</footer>",
+        )
+
+    # slots without a value are kept as they are
+    def test_render_missing(self):
+        template = Template("{{ title }} {{ unknown }}")
+
+        self.assertEqual(template.render(title="Home"), "Home {{ unknown }}")
+
+    # what if the template has no slots at all?
+    def test_render_static(self):
+        self.assertEqual(Template("<p>static</p>").render(title="Home"), "<p>static</p>")
+
+    # already encoded content goes in as it is, the rest is encoded
+    def test_render_bytes(self):
+        template = Template("<h1>{{ title }}</h1>{{ content }}")
+
+        self.assertEqual(
+            template.render_bytes(title="Hömé", content="<p>ü</p>".encode()), "<h1>Hömé</h1><p>ü</p>".encode()
+        )
+
+    def test_write(self):
+        fp = StringIO()
+        Template("[{{ content }}]").write(fp, content=LeafNode("b", "bold"))
+
+        self.assertEqual(fp.getvalue(), "[<b>bold</b>]")
+
+
+class TestLoadTemplate(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.path("template.html")
+        self.write_template("<h1>{{ title }}</h1>", 1_000_000_000)
+
+    def write_template(self, text, mtime_ns):
+        self.write(self.template, text)
+        os.utime(self.template, ns=(mtime_ns, mtime_ns))
+
+    def test_cached(self):
+        self.assertIs(load_template(self.template), load_template(self.template))
+
+    # a new mtime means the template is compiled again
+    def test_reload_on_change(self):
+        first = load_template(self.template)
+        self.write_template("<h2>{{ title }}</h2>", 2_000_000_000)
+        second = load_template(self.template)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.render(title="Home"), "<h2>Home</h2>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,6 +22,11 @@ class TestTextNode(unittest.TestCase):
 
         self.assertNotEqual(node, node2)
 
+    def test_slots(self):
+        node = TextNode("test node", TextNodeTypes.BOLD)
+
+        self.assertFalse(hasattr(node, "__dict__"))
+
     # test if splitting text nodes based on different delimiters work
     def test_split_nodes_delimiter_single(self):
         nodes = [
@@ -171,6 +176,20 @@ class TestTextNode(unittest.TestCase):
             ],
         )
 
+    # a link with the same text as an image before it used to be split at the image
+    def test_split_nodes_link_after_same_image(self):
+        nodes = [TextNode("![a](b) then [a](b)", TextNodeTypes.TEXT)]
+
+        new_nodes = split_nodes_image_or_link(nodes, TextNodeTypes.LINK)
+
+        self.assertEqual(
+            new_nodes,
+            [
+                TextNode("![a](b) then ", TextNodeTypes.TEXT),
+                TextNode("a", TextNodeTypes.LINK, "b"),
+            ],
+        )
+
     # what if there are no images in the text?
     def test_split_nodes_image_none(self):
         nodes = [
@@ -286,6 +305,79 @@ class TestTextNode(unittest.TestCase):
             ],
         )
 
+    # what if bold and italic are nested?
+    def test_text_to_textnodes_nested(self):
+        text = "**bold *both* bold** and *italic **both***"
+        nodes = text_to_textnodes(text)
+
+        self.assertEqual(
+            nodes,
+            [
+                TextNode("bold ", TextNodeTypes.BOLD),
+                TextNode("both", TextNodeTypes.BOLD_ITALIC),
+                TextNode(" bold", TextNodeTypes.BOLD),
+                TextNode(" and ", TextNodeTypes.TEXT),
+                TextNode("italic ", TextNodeTypes.ITALIC),
+                TextNode("both", TextNodeTypes.BOLD_ITALIC),
+            ],
+        )
+
+    # delimiters inside code spans and urls shouldn't be touched
+    def test_text_to_textnodes_literal(self):
+        text = "run `a * b` on [the docs](https://example.com/*/index) **now**"
+        nodes = text_to_textnodes(text)
+
+        self.assertEqual(
+            nodes,
+            [
+                TextNode("run ", TextNodeTypes.TEXT),
+                TextNode("a * b", TextNodeTypes.CODE),
+                TextNode(" on ", TextNodeTypes.TEXT),
+                TextNode("the docs", TextNodeTypes.LINK, "https://example.com/*/index"),
+                TextNode(" ", TextNodeTypes.TEXT),
+                TextNode("now", TextNodeTypes.BOLD),
+            ],
+        )
+
+    # a bracket that isn't a link is just text
+    def test_text_to_textnodes_bracket(self):
+        nodes = text_to_textnodes("an [aside] and ![not an image")
+
+        self.assertEqual(nodes, [TextNode("an [aside] and ![not an image", TextNodeTypes.TEXT)])
+
+    # a "[" before an image or link doesn't take it over, same nodes as splitting images first
+    def test_text_to_textnodes_stray_bracket(self):
+        self.assertEqual(
+            text_to_textnodes("[![build](badge.svg)](job)"),
+            [
+                TextNode("[", TextNodeTypes.TEXT),
+                TextNode("build", TextNodeTypes.IMAGE, "badge.svg"),
+                TextNode("](job)", TextNodeTypes.TEXT),
+            ],
+        )
+        self.assertEqual(
+            text_to_textnodes("Footnote [a] then *emph* and ![x](y.png)"),
+            [
+                TextNode("Footnote [a] then ", TextNodeTypes.TEXT),
+                TextNode("emph", TextNodeTypes.ITALIC),
+                TextNode(" and ", TextNodeTypes.TEXT),
+                TextNode("x", TextNodeTypes.IMAGE, "y.png"),
+            ],
+        )
+        self.assertEqual(
+            text_to_textnodes("bb[x](y)]a[**[x](y)**"),
+            [
+                TextNode("bb", TextNodeTypes.TEXT),
+                TextNode("x", TextNodeTypes.LINK, "y"),
+                TextNode("]a[", TextNodeTypes.TEXT),
+                TextNode("x", TextNodeTypes.LINK, "y"),
+            ],
+        )
+
+    def test_text_to_textnodes_unclosed(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("this is **not closed")
+
 
 if __name__ == "__main__":
     unittest.main()
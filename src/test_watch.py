@@ -0,0 +1,98 @@
+import os
+import threading
+import unittest
+
+from src.sitetest import TempDirTestCase
+from src.utils.watch import InotifyWatcher, PollingWatcher, watch
+
+
+class WatcherTests:
+    # shared between the polling and the inotify watcher
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.template = self.path("template.html")
+        self.write(self.template, "{{ content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.watcher = self.create_watcher([self.content, self.template])
+        self.addCleanup(self.watcher.close)
+
+    def test_modified(self):
+        path = os.path.join(self.content, "index.md")
+        self.write(path, "# Home page")
+
+        self.assertIn(path, self.watcher.read(0.1))
+
+    def test_created_in_new_dir(self):
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.watcher.read(0.1)
+        path = os.path.join(self.content, "blog", "post.md")
+        self.write(path, "# Post")
+
+        self.assertIn(path, self.watcher.read(0.1))
+
+    def test_deleted(self):
+        path = os.path.join(self.content, "index.md")
+        os.remove(path)
+
+        self.assertIn(path, self.watcher.read(0.1))
+
+    # only the template file, not its siblings
+    def test_single_file(self):
+        self.write(self.path("notes.txt"), "unrelated")
+        self.write(self.template, "<p>{{ content }}</p>")
+
+        self.assertEqual(self.watcher.read(0.1), {self.template})
+
+    def test_quiet(self):
+        self.assertEqual(self.watcher.read(0.05), set())
+
+
+class TestPollingWatcher(WatcherTests, TempDirTestCase):
+    def create_watcher(self, paths):
+        return PollingWatcher(paths)
+
+    def write(self, path, text):
+        super().write(path, text)
+        # make sure the mtime moves even on filesystems with coarse timestamps
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+class TestInotifyWatcher(WatcherTests, TempDirTestCase):
+    def create_watcher(self, paths):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            self.skipTest("inotify is not available")
+
+
+class FakeWatcher:
+    def __init__(self, batches, stop):
+        self.batches = batches
+        self.stop = stop
+
+    def read(self, timeout):
+        if not self.batches:
+            self.stop.set()
+            return set()
+        return self.batches.pop(0)
+
+    def close(self):
+        pass
+
+
+class TestWatch(unittest.TestCase):
+    # a burst of changes should end up in a single callback
+    def test_debounce(self):
+        stop = threading.Event()
+        watcher = FakeWatcher([{"a.md"}, {"b.md"}, {"a.md", "c.md"}, set(), {"d.md"}, set()], stop)
+        calls = []
+
+        watch([], calls.append, stop=stop, watcher=watcher)
+
+        self.assertEqual(calls, [{"a.md", "b.md", "c.md"}, {"d.md"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,14 @@
+import sys
+
+
 class TextNode:
+    # there are millions of these on big pages, slots keep them small
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
-        self.text_type = text_type
+        # only a handful of distinct types, share the strings
+        self.text_type = sys.intern(text_type) if type(text_type) is str else text_type
         self.url = url
 
     def __eq__(self, other):
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from .manifest import GENERATOR_VERSION
+
+BLOCK_CACHE_NAME = ".blockcache.json"
+
+
+def block_key(block_type: str, block: str) -> str:
+    # content address of a block, the type is part of it since the same text can be
+    # classified differently once someone registers a new block type
+    digest = hashlib.blake2b(block_type.encode(), digest_size=16)
+    digest.update(b"\0")
+    digest.update(block.encode())
+    return digest.hexdigest()
+
+
+class BlockCache:
+    # LRU cache of rendered block html keyed by `block_key`, so boilerplate that's
+    # repeated across pages (footers, nav lists, admonitions) is parsed once.
+    # disabled by default, every hook is a single attribute check then, like the profiler.
+    # bounded by the number of entries and optionally by the bytes of html it holds.
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = None):
+        self.enabled = False
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clear()
+
+    def clear(self):
+        self.entries = OrderedDict()  # key -> html, least recently used first
+        self.size = 0  # characters of html held
+        self.added = {}  # entries added since the last `snapshot`
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: str):
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return html
+
+    def put(self, key: str, html: str):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = html
+        self.size += len(html)
+        self.added[key] = html
+        while len(self.entries) > self.max_entries or (self.max_bytes is not None and self.size > self.max_bytes):
+            evicted_key, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            # keeps `added` within the same bounds in a process that never snapshots
+            self.added.pop(evicted_key, None)
+            self.evictions += 1
+
+    def update(self, entries: dict):
+        for key, html in entries.items():
+            self.put(key, html)
+
+    def snapshot(self) -> dict:
+        # what a pool worker sends back: the entries it added and its counters since
+        # the last snapshot, see `merge`
+        snapshot = {"added": self.added, "hits": self.hits, "misses": self.misses}
+        self.added = {}
+        self.hits = self.misses = 0
+        return snapshot
+
+    def merge(self, snapshot: dict):
+        self.update(snapshot["added"])
+        self.hits += snapshot["hits"]
+        self.misses += snapshot["misses"]
+
+    def load(self, path: str):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # no cache yet (or a broken one), start cold
+            return
+        if data.get("version") != GENERATOR_VERSION:
+            return
+        for key, html in data.get("entries", []):
+            self.put(key, html)
+        self.added = {}
+
+    def save(self, path: str):
+        # least recently used first, so loading it back keeps the order
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": GENERATOR_VERSION, "entries": list(self.entries.items())}, f)
+        os.replace(tmp_path, path)
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (
+            f"block cache: {self.hits} hits, {self.misses} misses ({rate:.0%} hit rate), "
+            f"{self.evictions} evictions, {len(self.entries)} entries"
+        )
+
+
+# the block cache of this process, pool workers get their own copy
+BLOCK_CACHE = BlockCache()
@@ -0,0 +1,76 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .sync import scan_tree
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, we just write gzip variants then
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js")
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtime=0 so the same input always gives the same bytes
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11)
+
+
+def compressors() -> list:
+    # (suffix, function) pairs for the encodings we can produce here
+    available = [(".gz", _gzip)]
+    if brotli is not None:
+        available.append((".br", _brotli))
+    return available
+
+
+def _is_fresh(sibling: str, mtime_ns: int) -> bool:
+    # siblings get the exact mtime of their original, anything else means it changed
+    try:
+        return os.stat(sibling).st_mtime_ns == mtime_ns
+    except OSError:
+        return False
+
+
+def compress_file(path: str) -> list[str]:
+    # writes the compressed siblings of `path` that are missing or out of date,
+    # returns the ones that were written
+    st = os.stat(path)
+    todo = [(suffix, fn) for suffix, fn in compressors() if not _is_fresh(path + suffix, st.st_mtime_ns)]
+    if not todo:
+        return []
+
+    with open(path, "rb") as f:
+        data = f.read()
+    written = []
+    for suffix, fn in todo:
+        sibling = path + suffix
+        tmp_path = sibling + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(fn(data))
+        # same mtime as the original, that's what marks the sibling as up to date
+        os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp_path, sibling)
+        written.append(sibling)
+    return written
+
+
+def compress_files(paths, jobs: int = None) -> list[str]:
+    # zlib and brotli release the GIL while compressing, so threads are enough here
+    paths = [path for path in paths if path.endswith(COMPRESSIBLE_EXTENSIONS) and os.path.isfile(path)]
+    written = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for result in executor.map(compress_file, paths):
+            written.extend(result)
+    return written
+
+
+def precompress(root: str, jobs: int = None) -> list[str]:
+    paths = [os.path.join(root, rel) for rel, entry in sorted(scan_tree(root).items()) if not entry.is_dir]
+    return compress_files(paths, jobs)
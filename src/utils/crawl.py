@@ -0,0 +1,202 @@
+import os
+import re
+
+# read in every directory, their patterns apply to everything under it like a .gitignore
+IGNORE_FILES = (".gitignore", ".ssgignore")
+# editor swap and backup files, version control directories and unfinished build
+# outputs, never part of a site
+DEFAULT_EXCLUDE = (
+    ".git",
+    ".hg",
+    ".svn",
+    "__pycache__",
+    ".DS_Store",
+    "*.swp",
+    "*.swo",
+    "*.swx",
+    "*~",
+    ".#*",
+    "\\#*#",  # emacs autosave, escaped so it isn't read as a comment
+    ".*.tmp",  # what a crashed build left of its outputs, see `output._tmp_path`
+) + IGNORE_FILES
+
+
+class CrawlEntry:
+    def __init__(self, path, rel, is_dir, size=0, mtime_ns=0, ino=0, dev=0):
+        self.path = path
+        self.rel = rel  # relative to the crawled root, with "/" separators
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.ino = ino
+        self.dev = dev
+
+    def __repr__(self):
+        return f"CrawlEntry({self.path!r}, {self.is_dir}, {self.size}, {self.mtime_ns})"
+
+
+def _translate(pattern: str) -> str:
+    # gitignore globs: `*` and `?` stay within one path segment, `**` spans any number
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[" and "]" in pattern[i + 2 :]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1 : end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            parts.append(f"[{body}]")
+            i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+class IgnoreRule:
+    def __init__(self, pattern: str, base: str = ""):
+        # `base` is the directory (relative to the root) of the file the rule came from
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # without a slash it matches the name at any depth, with one it's relative to `base`
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        regex = _translate(pattern)
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        if base:
+            regex = re.escape(base + "/") + regex
+        self.regex = re.compile(regex + r"\Z")
+
+    def matches(self, rel: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(rel) is not None
+
+
+def parse_ignore(lines, base: str = "") -> list[IgnoreRule]:
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("\\"):
+            # escaped leading "#" or "!"
+            line = line[1:]
+        rules.append(IgnoreRule(line, base))
+    return rules
+
+
+class PathFilter:
+    # decides what under `root` is part of the site: the exclude patterns, then the
+    # ignore files from the root down, the last rule that matches wins, `!pattern`
+    # takes a path back in. `include` patterns (if any) are what files have to match.
+
+    def __init__(self, root: str, include=(), exclude=DEFAULT_EXCLUDE, ignore_files=IGNORE_FILES):
+        self.root = root
+        self.include = [IgnoreRule(pattern) for pattern in include]
+        self.exclude = parse_ignore(exclude)
+        self.ignore_files = ignore_files
+        self._rules = {}  # relative dir -> every rule that applies inside it
+
+    def rules(self, rel_dir: str) -> list[IgnoreRule]:
+        rules = self._rules.get(rel_dir)
+        if rules is not None:
+            return rules
+        if rel_dir:
+            rules = list(self.rules(rel_dir.rpartition("/")[0]))
+        else:
+            rules = list(self.exclude)
+        for name in self.ignore_files:
+            try:
+                with open(os.path.join(self.root, rel_dir, name), "r") as f:
+                    rules.extend(parse_ignore(f, rel_dir))
+            except OSError:
+                continue
+        self._rules[rel_dir] = rules
+        return rules
+
+    def ignored(self, rel: str, is_dir: bool) -> bool:
+        ignored = False
+        for rule in self.rules(rel.rpartition("/")[0]):
+            if rule.negate == ignored and rule.matches(rel, is_dir):
+                ignored = not rule.negate
+        return ignored
+
+    def included(self, rel: str, is_dir: bool) -> bool:
+        return is_dir or not self.include or any(rule.matches(rel, False) for rule in self.include)
+
+    def allows(self, path: str) -> bool:
+        # for a single path, watch mode uses this for the files that changed. a path
+        # inside an ignored directory is ignored too, like the crawler never going in there.
+        rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+        if rel == "." or rel.startswith("../"):
+            return rel == "."
+        parts = rel.split("/")
+        for i in range(1, len(parts)):
+            if self.ignored("/".join(parts[:i]), True):
+                return False
+        is_dir = os.path.isdir(path)
+        return not self.ignored(rel, is_dir) and self.included(rel, is_dir)
+
+
+def crawl(
+    root: str,
+    include=(),
+    exclude=DEFAULT_EXCLUDE,
+    ignore_files=IGNORE_FILES,
+    stat=False,
+    follow_symlinks=True,
+    subdir: str = "",
+):
+    # walks `root` with scandir, yields CrawlEntry objects as it goes, a directory comes
+    # right before its contents and everything is sorted by name so builds are deterministic.
+    # `stat` fills in the size, mtime, inode and device of files, from the DirEntry's
+    # cached stat so there's no second stat per file.
+    # `subdir` only walks that part of the tree, the ignore files above it still count.
+    path_filter = PathFilter(root, include, exclude, ignore_files)
+    start = os.path.relpath(os.path.join(root, subdir), root).replace(os.sep, "/")
+    if start == ".":
+        start = ""
+    if not os.path.isdir(os.path.join(root, start)) or (start and not path_filter.allows(os.path.join(root, start))):
+        return
+
+    def listdir(rel_dir):
+        with os.scandir(os.path.join(root, rel_dir)) as it:
+            return sorted(it, key=lambda entry: entry.name)
+
+    stack = [(start, iter(listdir(start)))]
+    while stack:
+        rel_dir, entries = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+        is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+        if path_filter.ignored(rel, is_dir) or not path_filter.included(rel, is_dir):
+            continue
+        if is_dir:
+            yield CrawlEntry(entry.path, rel, True)
+            stack.append((rel, iter(listdir(rel))))
+        elif stat:
+            st = entry.stat(follow_symlinks=follow_symlinks)
+            yield CrawlEntry(entry.path, rel, False, st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+        else:
+            yield CrawlEntry(entry.path, rel, False)
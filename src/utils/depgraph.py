@@ -0,0 +1,123 @@
+import os
+import posixpath
+from urllib.parse import urlsplit
+
+from .template import load_template
+
+# what a page can depend on, and what part of it matters:
+#   template: the page is rendered with it, its content counts
+#   page:     the page links to another page, only whether it exists counts
+#   asset:    the page links to (or shows) a file in static/, only whether it exists counts
+# an include/snippet mechanism would add a kind whose content counts, like templates
+DEPENDENCY_KINDS = ("template", "page", "asset")
+
+PRESENT = "present"
+MISSING = "missing"
+
+
+def dependency_state(kind: str, path: str) -> str:
+    # what gets recorded for a dependency, the page is stale once it's different
+    if kind == "template":
+        return load_template(path).hash if os.path.exists(path) else MISSING
+    return PRESENT if os.path.exists(path) else MISSING
+
+
+def _link_target(url: str, output: str, dest_path: str):
+    # the path of a local link relative to the site root, None for anything external
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    if parts.path.startswith("/"):
+        target = parts.path
+    else:
+        page_dir = os.path.relpath(os.path.dirname(output), dest_path).replace(os.sep, "/")
+        target = posixpath.join("/", page_dir, parts.path)
+    target = posixpath.normpath(target).lstrip("/")
+    if target.startswith(".."):
+        return None
+    return target
+
+
+def _candidates(target: str, from_path: str, static_path: str) -> list[tuple[str, str]]:
+    # where a link to `target` can come from: a markdown page or a file in static/
+    if not target or target == ".":
+        return [("page", os.path.join(from_path, "index.md"))]
+    stem = target[: -len(".html")] if target.endswith(".html") else target
+    return [
+        ("page", os.path.join(from_path, stem + ".md")),
+        ("page", os.path.join(from_path, stem, "index.md")),
+        ("asset", os.path.join(static_path, target)),
+    ]
+
+
+def link_dependencies(
+    urls, output: str, from_path: str, dest_path: str, static_path: str = None
+) -> tuple[dict, list[str]]:
+    # {path: kind} for the local links and images of a page, and the urls that don't
+    # lead anywhere. a link that resolves is a dependency on that one file, a broken
+    # one on every file that would fix it. the assets are looked up in `static_path`,
+    # which is `dest_path` unless the pages are rendered somewhere else.
+    dependencies = {}
+    broken = []
+    for url in urls:
+        target = _link_target(url, output, dest_path)
+        if target is None:
+            continue
+        candidates = _candidates(target, from_path, static_path or dest_path)
+        candidates = [(kind, os.path.normpath(path)) for kind, path in candidates]
+        found = next(((kind, path) for kind, path in candidates if os.path.exists(path)), None)
+        if found is not None:
+            dependencies[found[1]] = found[0]
+            continue
+        broken.append(url)
+        for kind, path in candidates:
+            dependencies.setdefault(path, kind)
+    return dependencies, broken
+
+
+def dependency_states():
+    # `dependency_state` memoized for one build, lots of pages share their dependencies
+    states = {}
+
+    def state(kind: str, path: str) -> str:
+        key = (kind, path)
+        if key not in states:
+            states[key] = dependency_state(kind, path)
+        return states[key]
+
+    return state
+
+
+class DependencyGraph:
+    # page -> what it was built from, and the other way around. built from the
+    # "dependencies" of the manifest entries: {source: {path: [kind, state]}}
+
+    def __init__(self, entries: dict):
+        self.dependencies = {source: entry.get("dependencies") or {} for source, entry in entries.items()}
+        self.dependents = {}
+        # directory -> the pages depending on something under it, so a changed (or
+        # removed) directory is a lookup too instead of a scan of every dependency
+        self.dependents_under = {}
+        for source, dependencies in self.dependencies.items():
+            for path in dependencies:
+                self.dependents.setdefault(path, set()).add(source)
+                for directory in _parents(path):
+                    self.dependents_under.setdefault(directory, set()).add(source)
+
+    def affected(self, paths) -> set:
+        # the pages that depend on any of `paths`, a changed directory counts for
+        # everything under it
+        pages = set()
+        for path in paths:
+            path = os.path.normpath(path)
+            pages.update(self.dependents.get(path, ()))
+            pages.update(self.dependents_under.get(path, ()))
+        return pages
+
+
+def _parents(path: str):
+    # "a/b/c.md" -> "a/b", "a"
+    path = os.path.dirname(path)
+    while path and path != os.path.dirname(path):
+        yield path
+        path = os.path.dirname(path)
@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+
+from .pageindex import PageIndex
+
+SITEMAP_NAME = "sitemap.xml"
+RSS_NAME = "feed.xml"
+ATOM_NAME = "atom.xml"
+FEED_FILES = (SITEMAP_NAME, RSS_NAME, ATOM_NAME)
+# pages in a feed, the newest ones
+FEED_LENGTH = 20
+
+# the feeds of a site without any dated page still need a date, this one never changes
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# nothing in here looks at the clock, the same index always gives the same bytes so an
+# unchanged feed isn't rewritten (see `OutputWriter`)
+
+
+def _absolute(site_url: str, url: str) -> str:
+    return site_url.rstrip("/") + url
+
+
+def _feed_title(index: PageIndex, site_url: str, title: str = None) -> str:
+    # the home page's title unless there's one given
+    if title:
+        return title
+    home = index.find("/")
+    return home.title if home is not None and home.title else site_url
+
+
+def sitemap_xml(index: PageIndex, site_url: str) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for page in index:
+        lastmod = f"<lastmod>{page.date.date().isoformat()}</lastmod>" if page.date is not None else ""
+        lines.append(f"<url><loc>{escape(_absolute(site_url, page.url))}</loc>{lastmod}</url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def rss_feed(index: PageIndex, site_url: str, title: str = None, limit: int = FEED_LENGTH) -> str:
+    title = escape(_feed_title(index, site_url, title))
+    link = escape(_absolute(site_url, "/"))
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0">',
+        "<channel>",
+        f"<title>{title}</title>",
+        f"<link>{link}</link>",
+        f"<description>{title}</description>",
+    ]
+    for page in index.recent(limit):
+        url = escape(_absolute(site_url, page.url))
+        lines.append(
+            f"<item><title>{escape(page.title or page.url)}</title><link>{url}</link>"
+            f"<guid>{url}</guid><pubDate>{format_datetime(page.date)}</pubDate>"
+            f"<description>{escape(page.summary)}</description></item>"
+        )
+    lines += ["</channel>", "</rss>"]
+    return "\n".join(lines) + "\n"
+
+
+def atom_feed(
+    index: PageIndex, site_url: str, title: str = None, author: str = None, limit: int = FEED_LENGTH
+) -> str:
+    # atom wants an author for every entry, the feed-level one covers them all.
+    # the pages don't have one, it's `author` or else the feed's title
+    pages = index.recent(limit)
+    updated = pages[0].date if pages else _EPOCH
+    home = _absolute(site_url, "/")
+    title = _feed_title(index, site_url, title)
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"<title>{escape(title)}</title>",
+        f"<link href={quoteattr(home)}/>",
+        f'<link rel="self" href={quoteattr(_absolute(site_url, "/" + ATOM_NAME))}/>',
+        f"<id>{escape(home)}</id>",
+        f"<updated>{updated.isoformat()}</updated>",
+        f"<author><name>{escape(author or title)}</name></author>",
+    ]
+    for page in pages:
+        url = _absolute(site_url, page.url)
+        lines.append(
+            f"<entry><title>{escape(page.title or page.url)}</title><link href={quoteattr(url)}/>"
+            f"<id>{escape(url)}</id><updated>{page.date.isoformat()}</updated>"
+            f"<summary>{escape(page.summary)}</summary></entry>"
+        )
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def site_feeds(index: PageIndex, site_url: str, title: str = None, author: str = None) -> dict:
+    # file name -> content for everything made from the page index
+    return {
+        SITEMAP_NAME: sitemap_xml(index, site_url),
+        RSS_NAME: rss_feed(index, site_url, title),
+        ATOM_NAME: atom_feed(index, site_url, title, author),
+    }
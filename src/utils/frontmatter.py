@@ -0,0 +1,56 @@
+import re
+import typing as t
+
+# the line that opens and closes a header block -> what separates keys from values:
+#   ---             +++
+#   title: Hello    title = "Hello"
+#   draft: true     draft = true
+#   ---             +++
+FRONT_MATTER_DELIMITERS = {"---": ":", "+++": "="}
+
+_KEY = re.compile(r"\w+\Z")
+
+
+def parse_value(value: str):
+    # quoted strings lose their quotes, true/false become booleans, everything else stays a string
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+
+def parse_front_matter(lines: t.Iterable[str], separator: str) -> dict:
+    # the lines between the delimiters, blank lines and "#" comments are skipped.
+    # keys have to be words so they can be used as template placeholders
+    meta = {}
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, found, value = line.partition(separator)
+        key = key.strip()
+        if not found or not _KEY.match(key):
+            raise ValueError(f"Invalid front matter on line {number + 1}: {line!r}")
+        meta[key] = parse_value(value)
+    return meta
+
+
+def split_front_matter(lines: t.Iterator[str]) -> tuple[dict, list[str]]:
+    # reads the header block off the start of `lines`, returns the metadata and the
+    # lines that were read but aren't part of it (those come before the rest of `lines`).
+    # only the header is read, the rest of the document is left to whoever reads on.
+    first = next(lines, None)
+    if first is None:
+        return {}, []
+    separator = FRONT_MATTER_DELIMITERS.get(first.rstrip())
+    if separator is None:
+        return {}, [first]
+    header = []
+    for line in lines:
+        if line.rstrip() == first.rstrip():
+            return parse_front_matter(header, separator), []
+        header.append(line)
+    # never closed, so it wasn't a header after all
+    return {}, [first] + header
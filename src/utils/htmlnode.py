@@ -1,26 +1,46 @@
+import typing as t
+
 from ..enums import TextNodeTypes
-from ..htmlnode import HTMLNode, LeafNode
+from ..htmlnode import HTMLNode, LeafNode, ParentNode
 from ..textnode import TextNode
 
+# text type -> function(text_node) returning its HTMLNode, see `register_text_type`
+_TEXT_NODE_CONVERTERS = {
+    TextNodeTypes.TEXT: lambda text_node: LeafNode(tag=None, value=text_node.text),
+    TextNodeTypes.BOLD: lambda text_node: LeafNode(tag="b", value=text_node.text),
+    TextNodeTypes.BOLD_ITALIC: lambda text_node: ParentNode(tag="b", children=[LeafNode(tag="i", value=text_node.text)]),
+    TextNodeTypes.CODE: lambda text_node: LeafNode(tag="code", value=text_node.text),
+    TextNodeTypes.ITALIC: lambda text_node: LeafNode(tag="i", value=text_node.text),
+    TextNodeTypes.LINK: lambda text_node: LeafNode(tag="a", value=text_node.text, props={"href": text_node.url}),
+    TextNodeTypes.IMAGE: lambda text_node: LeafNode(
+        tag="img", value=None, props={"src": text_node.url, "alt": text_node.text}
+    ),
+}
 
-def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
-    available_types = TextNodeTypes.get()
 
-    if text_node.text_type not in available_types:
+# types whose converter was replaced, render.py drops its own markup for them before
+# the next document, see `take_replaced_text_types`
+_REPLACED_TEXT_TYPES = set()
+
+
+def register_text_type(text_type: str, convert: t.Callable[[TextNode], HTMLNode]):
+    # lets other modules add their own inline node types (or replace ours), the direct
+    # renderer uses `convert` as well until it gets its own with `register_inline_renderer`
+    if text_type in _TEXT_NODE_CONVERTERS:
+        _REPLACED_TEXT_TYPES.add(text_type)
+    _TEXT_NODE_CONVERTERS[text_type] = convert
+
+
+def take_replaced_text_types() -> set:
+    replaced = set(_REPLACED_TEXT_TYPES)
+    _REPLACED_TEXT_TYPES.clear()
+    return replaced
+
+
+def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
+    convert = _TEXT_NODE_CONVERTERS.get(text_node.text_type)
+    if convert is None:
         raise ValueError(
-            f"Invalid text type: {text_node.text_type}, must be one of {available_types}"
-        )
-    if text_node.text_type == TextNodeTypes.TEXT:
-        return LeafNode(tag=None, value=text_node.text)
-    if text_node.text_type == TextNodeTypes.BOLD:
-        return LeafNode(tag="b", value=text_node.text)
-    if text_node.text_type == TextNodeTypes.CODE:
-        return LeafNode(tag="code", value=text_node.text)
-    if text_node.text_type == TextNodeTypes.ITALIC:
-        return LeafNode(tag="i", value=text_node.text)
-    if text_node.text_type == TextNodeTypes.LINK:
-        return LeafNode(tag="a", value=text_node.text, props={"href": text_node.url})
-    if text_node.text_type == TextNodeTypes.IMAGE:
-        return LeafNode(
-            tag="img", value=None, props={"src": text_node.url, "alt": text_node.text}
+            f"Invalid text type: {text_node.text_type}, must be one of {list(_TEXT_NODE_CONVERTERS)}"
         )
+    return convert(text_node)
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+
+# bump this whenever the rendering pipeline changes its output,
+# every page recorded with an older version gets rebuilt.
+GENERATOR_VERSION = "2"
+MANIFEST_NAME = ".manifest.json"
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    # keeps track of what each source page was rendered from, so the next build
+    # can skip the pages whose inputs didn't change.
+    # entries are keyed by the source path:
+    #   {"source_hash": ..., "template_hash": ..., "output": ..., "version": ...}
+    # plus the page's front matter, title and summary under "meta" and the size of its
+    # html, so the metadata of every page is at hand without reading the sources, see
+    # `PageIndex`.
+
+    def __init__(self, path: str, entries: dict = None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, path: str) -> "BuildManifest":
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # no manifest yet (or a broken one), everything is stale
+            return cls(path)
+        return cls(path, data.get("entries", {}))
+
+    def save(self):
+        # write to a temporary file first so an interrupted build
+        # never leaves a half-written manifest behind
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": GENERATOR_VERSION, "entries": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def stale_reason(
+        self, source: str, source_hash: str, template_hash: str, output: str, state, drafts: bool = False
+    ) -> str:
+        # why the page of `source` has to be built again, None when it doesn't.
+        # `state(kind, path)` gives the current state of a recorded dependency,
+        # see `depgraph.dependency_state`. `drafts` is whether draft pages are built.
+        entry = self.entries.get(source)
+        if entry is None:
+            return "new page"
+        if entry.get("version") != GENERATOR_VERSION:
+            return "built by another version of the generator"
+        if entry.get("source_hash") != source_hash:
+            return "source changed"
+        if entry.get("template_hash") != template_hash:
+            return "template changed"
+        if entry.get("output") != output:
+            return "output path changed"
+        skipped = (entry.get("meta") or {}).get("draft") is True and not drafts
+        if skipped != entry.get("skipped", False):
+            return "drafts are built" if drafts else "drafts are skipped"
+        if not skipped and not os.path.exists(output):
+            return "output missing"
+        dependencies = entry.get("dependencies")
+        if dependencies is None:
+            return "no dependencies recorded"
+        for path, (kind, recorded) in sorted(dependencies.items()):
+            current = state(kind, path)
+            if current == recorded:
+                continue
+            if kind == "template":
+                return f"template {path} changed"
+            return f"linked {kind} {path} was {'removed' if current == 'missing' else 'added'}"
+        return None
+
+    def record(
+        self,
+        source: str,
+        source_hash: str,
+        template_hash: str,
+        output: str,
+        dependencies: dict = None,
+        size: int = None,
+        mtime_ns: int = None,
+        meta: dict = None,
+        skipped: bool = False,
+        output_size: int = None,
+    ):
+        # `dependencies` is {path: [kind, state]}, what the page was built from besides its source.
+        # `size` and `mtime_ns` are the source's when it was hashed, see `known_hash`.
+        # `meta` is the page's front matter and title, `skipped` marks a draft that wasn't written.
+        self.entries[source] = {
+            "source_hash": source_hash,
+            "template_hash": template_hash,
+            "output": output,
+            "version": GENERATOR_VERSION,
+        }
+        if dependencies is not None:
+            self.entries[source]["dependencies"] = dependencies
+        if meta:
+            self.entries[source]["meta"] = meta
+        if skipped:
+            self.entries[source]["skipped"] = True
+        if output_size is not None:
+            self.entries[source]["output_size"] = output_size
+        if size is not None:
+            self.touch(source, size, mtime_ns)
+
+    def known_hash(self, source: str, size: int, mtime_ns: int) -> str:
+        # the recorded hash of `source` if its size and mtime are still the ones it was
+        # hashed with, saves reading every source on a build where nothing changed
+        entry = self.entries.get(source)
+        if entry is None or entry.get("size") != size or entry.get("mtime_ns") != mtime_ns:
+            return None
+        return entry.get("source_hash")
+
+    def touch(self, source: str, size: int, mtime_ns: int):
+        entry = self.entries.get(source)
+        if entry is not None:
+            entry["size"] = size
+            entry["mtime_ns"] = mtime_ns
+
+    def forget(self, source: str):
+        self.entries.pop(source, None)
+
+    def orphans(self, sources) -> list[tuple[str, dict]]:
+        # entries whose source file doesn't exist anymore
+        sources = set(sources)
+        return [(source, entry) for source, entry in sorted(self.entries.items()) if source not in sources]
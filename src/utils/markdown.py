@@ -1,99 +1,252 @@
 import re
+import time
+import typing as t
 
-from ..enums import MarkdownBlockTypes
+from ..enums import MarkdownBlockTypes, TextNodeTypes
 from ..htmlnode import HTMLNode, LeafNode, ParentNode
+from .blockcache import BLOCK_CACHE, block_key
+from .profiling import PROFILER
+
+
+# compiled once here instead of handing the pattern strings to `re` on every call
+_IMAGE_PATTERN = re.compile(r"!\[(.*?)\]\((.*?)\)")
+_LINK_PATTERN = re.compile(r"(?<!\!)\[(.*?)\]\((.*?)\)")
+# both at once, group 1 is the "!" that makes it an image. the text can't have brackets
+# in it, so a stray "[" never runs on into a later image or link on the same line
+_IMAGE_OR_LINK_PATTERN = re.compile(r"(!?)\[([^\[\]]*)\]\((.*?)\)")
 
 
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+    return _IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"(?<!\!)\[(.*?)\]\((.*?)\)", text)
-
-def markdown_to_blocks(markdown: str) -> list[str]:
-    blocks = []
+    return _LINK_PATTERN.findall(text)
+
+
+def iter_markdown_images_and_links(text: str, text_type: str = None) -> t.Iterator[tuple[str, str, str, int, int]]:
+    # one pass over the text for images and links together, yields
+    # (text_type, text, url, start, end) so callers can slice around the match
+    # instead of searching for it again. `text_type` limits it to one of the two.
+    if text_type == TextNodeTypes.IMAGE or text_type == TextNodeTypes.LINK:
+        pattern = _IMAGE_PATTERN if text_type == TextNodeTypes.IMAGE else _LINK_PATTERN
+        for match in pattern.finditer(text):
+            value, url = match.groups()
+            yield (text_type, value, url, *match.span())
+        return
+    for match in _IMAGE_OR_LINK_PATTERN.finditer(text):
+        bang, value, url = match.groups()
+        yield (TextNodeTypes.IMAGE if bang else TextNodeTypes.LINK, value, url, *match.span())
+
+
+def match_markdown_image_or_link(text: str, pos: int) -> t.Optional[tuple[str, str, str, int]]:
+    # the image or link starting right at `pos` as (text_type, text, url, end), or None
+    match = _IMAGE_OR_LINK_PATTERN.match(text, pos)
+    if match is None:
+        return None
+    bang, value, url = match.groups()
+    return TextNodeTypes.IMAGE if bang else TextNodeTypes.LINK, value, url, match.end()
+
+
+def iter_lines(text: str) -> t.Iterator[str]:
+    # the lines of `text` one at a time, like `text.split("\n")` without the list
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def iter_blocks(lines: t.Iterable[str]) -> t.Iterator[tuple[str, list[str]]]:
+    # streaming block parser: takes any iterable of lines (a string split up by
+    # `iter_lines`, or an open file) and yields (block_type, lines) as soon as a
+    # block ends, so only one block is ever held in memory.
+    # a fence that opens a block keeps everything up to the closing fence together,
+    # blank lines included.
+    # a fence that's never closed wasn't one, its lines are split on the blank lines like
+    # the rest of the document once the end is reached.
+    # lines that come with an `on_block(block_type, lines)` (see `SourceScan`) get to see
+    # every block they were split into.
+    blocks = _split_blocks(lines)
+    on_block = getattr(lines, "on_block", None)
+    if on_block is None:
+        return blocks
+    return _observed_blocks(blocks, on_block)
+
+
+def _observed_blocks(blocks, on_block):
+    for block_type, block in blocks:
+        on_block(block_type, block)
+        yield block_type, block
+
+
+def _split_blocks(lines: t.Iterable[str]) -> t.Iterator[tuple[str, list[str]]]:
     block = []
-    lines = markdown.split("\n")
+    in_fence = False
     for line in lines:
-        if len(line.strip()) > 0:
+        if line.endswith("\n"):
+            line = line[:-1]
+
+        if in_fence:
             block.append(line)
+            if line.startswith("```"):
+                yield MarkdownBlockTypes.CODE, block
+                block = []
+                in_fence = False
+            continue
 
-        else:
-            if len(block) > 0:
-                blocks.append(block)
+        if not line.strip():
+            if block:
+                yield lines_to_block_type(block), block
                 block = []
+            continue
 
-    return ["\n".join(block) for block in blocks]
+        # only "```" and an info string open a fence, a "```code``` and more" line doesn't
+        if not block and line.startswith("```") and "`" not in line[3:]:
+            in_fence = True
+        block.append(line)
 
+    if in_fence:
+        yield from _split_unclosed_fence(block)
+    elif block:
+        yield lines_to_block_type(block), block
 
-def block_to_block_type(markdown: str) -> str:
-    lines = markdown.split("\n")
-
-    if (
-        markdown.startswith("# ")
-        or markdown.startswith("## ")
-        or markdown.startswith("### ")
-        or markdown.startswith("#### ")
-        or markdown.startswith("##### ")
-        or markdown.startswith("###### ")
-    ):
+
+def _split_unclosed_fence(lines: list[str]) -> t.Iterator[tuple[str, list[str]]]:
+    # nothing after the opening line starts with "```" (it would have closed it), so
+    # there's no fence left in here, just blocks between blank lines
+    block = []
+    for line in lines + [""]:
+        if line.strip():
+            block.append(line)
+        elif block:
+            yield lines_to_block_type(block), block
+            block = []
+
+
+def markdown_to_blocks(markdown: str) -> list[str]:
+    return ["\n".join(lines) for _, lines in iter_blocks(iter_lines(markdown))]
+
+
+# first character of a block -> the classifiers to try for it, in order. a classifier
+# takes the block's lines and returns its block type or None, anything that nobody
+# claims is a paragraph. see `register_block_type`.
+_BLOCK_CLASSIFIERS = {}
+# block type -> function(block) returning its HTMLNode
+_BLOCK_PROCESSORS = {}
+# types whose processor was replaced, render.py drops its own markup for them before
+# the next document, see `take_replaced_block_types`
+_REPLACED_BLOCK_TYPES = set()
+
+
+def register_block_type(
+    block_type: str,
+    process: t.Callable[[str], HTMLNode],
+    classify: t.Callable[[list[str]], t.Optional[str]] = None,
+    first_chars: str = "",
+):
+    # adds a block type (or replaces a built-in one) without touching the parser:
+    # `classify` is tried on blocks starting with one of `first_chars`, before the
+    # classifiers that were already there, `process` turns the block into a node.
+    # the direct renderer falls back to `process` too, until it gets its own with
+    # `register_block_renderer`
+    if block_type in _BLOCK_PROCESSORS:
+        _REPLACED_BLOCK_TYPES.add(block_type)
+    _BLOCK_PROCESSORS[block_type] = process
+    if classify is not None:
+        for char in first_chars:
+            _BLOCK_CLASSIFIERS[char] = [classify] + _BLOCK_CLASSIFIERS.get(char, [])
+
+
+def block_processor(block_type: str) -> t.Optional[t.Callable[[str], HTMLNode]]:
+    return _BLOCK_PROCESSORS.get(block_type)
+
+
+def take_replaced_block_types() -> set:
+    replaced = set(_REPLACED_BLOCK_TYPES)
+    _REPLACED_BLOCK_TYPES.clear()
+    return replaced
+
+
+def lines_to_block_type(lines: list[str]) -> str:
+    for classify in _BLOCK_CLASSIFIERS.get(lines[0][:1], ()):
+        block_type = classify(lines)
+        if block_type is not None:
+            return block_type
+    return MarkdownBlockTypes.PARAGRAPH
+
+
+def _classify_heading(lines: list[str]) -> t.Optional[str]:
+    first = lines[0]
+    level = len(first) - len(first.lstrip("#"))
+    if level <= 6 and first[level : level + 1] == " ":
         return MarkdownBlockTypes.HEADING
+    return None
 
-    if len(lines) > 0 and lines[0].startswith("```") and lines[-1].startswith("```"):
+
+def _classify_code(lines: list[str]) -> t.Optional[str]:
+    if lines[0].startswith("```") and lines[-1].startswith("```"):
         return MarkdownBlockTypes.CODE
+    return None
 
-    if markdown.startswith(">"):
-        for line in lines:
-            if not line.startswith(">"):
-                return MarkdownBlockTypes.PARAGRAPH
-        return MarkdownBlockTypes.QUOTE
-
-    if markdown.startswith("* "):
-        for line in lines:
-            if not line.startswith("* "):
-                return MarkdownBlockTypes.PARAGRAPH
-        return MarkdownBlockTypes.UNORDERED_LIST
-
-    if markdown.startswith("- "):
-        for line in lines:
-            if not line.startswith("- "):
-                return MarkdownBlockTypes.PARAGRAPH
-        return MarkdownBlockTypes.UNORDERED_LIST
-
-    if markdown.startswith("1. "):
-        for i, line in enumerate(lines):
-            if not line.startswith(f"{i+1}. "):
-                return MarkdownBlockTypes.PARAGRAPH
-        return MarkdownBlockTypes.ORDERED_LIST
 
-    return MarkdownBlockTypes.PARAGRAPH
+def _classify_quote(lines: list[str]) -> t.Optional[str]:
+    for line in lines:
+        if not line.startswith(">"):
+            return None
+    return MarkdownBlockTypes.QUOTE
 
-def markdown_to_html(markdown: str) -> ParentNode:
-    parent = ParentNode(tag="div", children=[])
 
-    blocks = markdown_to_blocks(markdown)
-    block_types = [block_to_block_type(block) for block in blocks]
-    html_nodes = []
+def _classify_unordered_list(lines: list[str]) -> t.Optional[str]:
+    marker = lines[0][:2]
+    if marker != "* " and marker != "- ":
+        return None
+    for line in lines:
+        if not line.startswith(marker):
+            return None
+    return MarkdownBlockTypes.UNORDERED_LIST
 
-    for block, block_type in zip(blocks, block_types):
-        if block_type == MarkdownBlockTypes.HEADING:
-            html_nodes.append(_process_heading(block))
 
-        if block_type == MarkdownBlockTypes.CODE:
-            html_nodes.append(_process_code_block(block))
+def _classify_ordered_list(lines: list[str]) -> t.Optional[str]:
+    for i, line in enumerate(lines):
+        if not line.startswith(f"{i+1}. "):
+            return None
+    return MarkdownBlockTypes.ORDERED_LIST
 
-        if block_type == MarkdownBlockTypes.PARAGRAPH:
-            html_nodes.append(_process_paragraphs(block))
 
-        if block_type == MarkdownBlockTypes.QUOTE:
-            html_nodes.append(_process_quotes(block))
+def block_to_block_type(markdown: str) -> str:
+    return lines_to_block_type(markdown.split("\n"))
 
-        if block_type == MarkdownBlockTypes.UNORDERED_LIST:
-            html_nodes.append(_process_unordered_list(block))
+def markdown_to_html(markdown: t.Union[str, t.Iterable[str]]) -> ParentNode:
+    # takes the markdown itself or anything that yields its lines, like an open file
+    parent = ParentNode(tag="div", children=[])
 
-        if block_type == MarkdownBlockTypes.ORDERED_LIST:
-            html_nodes.append(_process_ordered_list(block))
+    lines = iter_lines(markdown) if isinstance(markdown, str) else markdown
+    with PROFILER.stage("blocks"):
+        blocks = [("\n".join(block), block_type) for block_type, block in iter_blocks(lines)]
+    html_nodes = []
+
+    for block, block_type in blocks:
+        process = _BLOCK_PROCESSORS.get(block_type)
+        if process is None:
+            continue
+        if not BLOCK_CACHE.enabled:
+            html_nodes.append(process(block))
+            continue
+        # a cache hit comes back as a tagless leaf holding the block's html, same
+        # output but without the subtree
+        key = block_key(block_type, block)
+        html = BLOCK_CACHE.get(key)
+        if html is not None:
+            html_nodes.append(LeafNode(tag=None, value=html))
+            continue
+        # the block is serialized once, for the cache, the page gets the same html as a leaf
+        html = process(block).to_html()
+        BLOCK_CACHE.put(key, html)
+        html_nodes.append(LeafNode(tag=None, value=html))
 
     parent.children = html_nodes
 
@@ -103,7 +256,12 @@ def _process_value(value: str) -> list[LeafNode]:
     from .htmlnode import text_node_to_html_node
     from .textnode import text_to_textnodes
 
+    # called once per list item or paragraph, too often for a trace event each
+    if not PROFILER.enabled:
+        return [text_node_to_html_node(text_node) for text_node in text_to_textnodes(value)]
+    start = time.perf_counter()
     text_nodes = text_to_textnodes(value)
+    PROFILER.add("inline", time.perf_counter() - start)
     return [text_node_to_html_node(text_node) for text_node in text_nodes]
 
 def _process_unordered_list(unordered_list_block: str) -> HTMLNode:
@@ -148,3 +306,11 @@ def _process_quotes(quote_block: str) -> HTMLNode:
         tag="blockquote",
         children=_process_value("\n".join([line[2:] for line in quote_block.split("\n")])),
     )
+
+
+register_block_type(MarkdownBlockTypes.PARAGRAPH, _process_paragraphs)
+register_block_type(MarkdownBlockTypes.HEADING, _process_heading, _classify_heading, "#")
+register_block_type(MarkdownBlockTypes.CODE, _process_code_block, _classify_code, "`")
+register_block_type(MarkdownBlockTypes.QUOTE, _process_quotes, _classify_quote, ">")
+register_block_type(MarkdownBlockTypes.UNORDERED_LIST, _process_unordered_list, _classify_unordered_list, "*-")
+register_block_type(MarkdownBlockTypes.ORDERED_LIST, _process_ordered_list, _classify_ordered_list, "1")
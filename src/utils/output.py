@@ -0,0 +1,125 @@
+import filecmp
+import os
+from contextlib import contextmanager
+
+
+# bytes compared at a time against a file that's already there
+COMPARE_CHUNK_SIZE = 1 << 16
+
+
+def _same_bytes(path: str, data: bytes) -> bool:
+    # size first, that's just a stat, the bytes only when the sizes match. the file is
+    # read in chunks so there's never a second copy of a big page in memory
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        view = memoryview(data)
+        with open(path, "rb") as f:
+            for start in range(0, len(data), COMPARE_CHUNK_SIZE):
+                if f.read(COMPARE_CHUNK_SIZE) != view[start : start + COMPARE_CHUNK_SIZE]:
+                    return False
+        return True
+    except OSError:
+        return False
+
+
+def _tmp_path(path: str) -> str:
+    # hidden and unique to this process, so nothing serves it and parallel builds don't collide
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+
+
+def is_tmp_path(path: str) -> bool:
+    # one of ours from `_tmp_path`, or what a crashed build left of it
+    name = os.path.basename(path)
+    return name.startswith(".") and name.endswith(".tmp")
+
+
+def _fsync_path(path: str, flags=os.O_RDONLY):
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class OutputWriter:
+    # the write layer for generated files:
+    #   - a file whose new content is byte for byte what's already there isn't touched,
+    #     its mtime stays the same so the sync and the compressed siblings skip it too
+    #   - changed files go to a temporary file first and are renamed over the old one,
+    #     so nothing ever sees a half-written page
+    #   - the renames happen together in `commit`, with `fsync` every temporary file is
+    #     synced first (one batch instead of one sync per write) and the directories after
+    # use it as a context manager, `commit` runs on success and `abort` on an exception.
+
+    def __init__(self, fsync: bool = False):
+        self.fsync = fsync
+        self.pending = []  # (tmp_path, path) waiting for `commit`
+        self.written = []
+        self.unchanged = []
+
+    def write(self, path: str, data) -> int:
+        # returns the size of `path` in bytes once it's committed, whether it's going
+        # to change shows in `unchanged`
+        if isinstance(data, str):
+            data = data.encode()
+        if _same_bytes(path, data):
+            self.unchanged.append(path)
+            return len(data)
+        tmp_path = _tmp_path(path)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        self.pending.append((tmp_path, path))
+        return len(data)
+
+    @contextmanager
+    def open(self, path: str):
+        # a text file to stream into, compared and staged like `write` once it's closed
+        tmp_path = _tmp_path(path)
+        with open(tmp_path, "w") as f:
+            try:
+                yield f
+            except BaseException:
+                f.close()
+                os.remove(tmp_path)
+                raise
+        if os.path.exists(path) and filecmp.cmp(tmp_path, path, shallow=False):
+            os.remove(tmp_path)
+            self.unchanged.append(path)
+        else:
+            self.pending.append((tmp_path, path))
+
+    def commit(self) -> list[str]:
+        # puts every pending file in place, returns their paths
+        pending, self.pending = self.pending, []
+        if self.fsync:
+            for tmp_path, _ in pending:
+                _fsync_path(tmp_path)
+        for tmp_path, path in pending:
+            os.replace(tmp_path, path)
+        if self.fsync:
+            # the renames only last once the directories are synced too
+            for directory in sorted({os.path.dirname(path) or "." for _, path in pending}):
+                _fsync_path(directory)
+        paths = [path for _, path in pending]
+        self.written.extend(paths)
+        return paths
+
+    def abort(self):
+        pending, self.pending = self.pending, []
+        for tmp_path, _ in pending:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
@@ -0,0 +1,84 @@
+import heapq
+import os
+import typing as t
+from datetime import datetime, timezone
+
+
+class PageEntry:
+    def __init__(self, url, title, date=None, size=0, summary="", source=None):
+        self.url = url  # site-relative, "/blog/" for blog/index.html
+        self.title = title
+        self.date = date  # aware datetime or None
+        self.size = size  # bytes of html
+        self.summary = summary
+        self.source = source
+
+    def __repr__(self):
+        return f"PageEntry({self.url!r}, {self.title!r}, {self.date}, {self.size})"
+
+
+def page_url(output: str, dest_path: str) -> str:
+    rel = os.path.relpath(output, dest_path).replace(os.sep, "/")
+    if rel == "index.html":
+        return "/"
+    if rel.endswith("/index.html"):
+        return "/" + rel[: -len("index.html")]
+    return "/" + rel
+
+
+def parse_date(value) -> t.Optional[datetime]:
+    # front matter dates are ISO 8601, a date without a time zone is taken as UTC
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date
+
+
+class PageIndex:
+    # every published page of a build with what listings, feeds and sitemaps need.
+    # it isn't stored on its own: the manifest already keeps each page's metadata
+    # (front matter, title, summary) and html size, recorded when the page was
+    # rendered, so the index is put together from it without reading a single source
+    # and stays up to date as pages are rebuilt incrementally.
+
+    def __init__(self, entries: t.Iterable[PageEntry]):
+        self.entries = sorted(entries, key=lambda entry: entry.url)
+
+    @classmethod
+    def from_manifest(cls, manifest, dest_path: str) -> "PageIndex":
+        entries = []
+        for source, entry in manifest.entries.items():
+            if entry.get("skipped"):
+                # a draft that wasn't built
+                continue
+            meta = entry.get("meta") or {}
+            entries.append(
+                PageEntry(
+                    page_url(entry["output"], dest_path),
+                    meta.get("title"),
+                    parse_date(meta.get("date")),
+                    entry.get("output_size", 0),
+                    meta.get("summary", ""),
+                    source,
+                )
+            )
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self) -> t.Iterator[PageEntry]:
+        return iter(self.entries)
+
+    def find(self, url: str) -> t.Optional[PageEntry]:
+        return next((entry for entry in self.entries if entry.url == url), None)
+
+    def recent(self, limit: int) -> list[PageEntry]:
+        # the `limit` newest dated pages, newest first
+        dated = (entry for entry in self.entries if entry.date is not None)
+        return heapq.nlargest(limit, dated, key=lambda entry: (entry.date, entry.url))
@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class Profiler:
+    # low overhead build profiler: when it's disabled every hook is a single attribute
+    # check, when it's enabled stages are timed with perf_counter and summed up per
+    # stage and per page. stages with `trace=True` also end up in the chrome trace.
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.totals = {}  # stage -> seconds
+        self.counts = {}  # stage -> number of times it ran
+        self.pages = []  # {"path", "seconds", "bytes_in", "bytes_out", "stages"}
+        self.events = []  # chrome trace "complete" events
+        self.current_page = None
+
+    def add(self, name: str, seconds: float):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if self.current_page is not None:
+            stages = self.current_page["stages"]
+            stages[name] = stages.get(name, 0.0) + seconds
+
+    def _event(self, name, category, start, end, args=None):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    @contextmanager
+    def _timed(self, name, trace):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.add(name, end - start)
+            if trace:
+                self._event(name, "stage", start, end)
+
+    def stage(self, name: str, trace: bool = True):
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name, trace)
+
+    @contextmanager
+    def _page(self, path):
+        record = {"path": path, "seconds": 0.0, "bytes_in": 0, "bytes_out": 0, "stages": {}}
+        previous, self.current_page = self.current_page, record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            end = time.perf_counter()
+            self.current_page = previous
+            record["seconds"] = end - start
+            self.pages.append(record)
+            self._event(path, "page", start, end, {"bytes_in": record["bytes_in"], "bytes_out": record["bytes_out"]})
+
+    def page(self, path: str):
+        # yields the page record so the caller can fill in the byte counts, None when disabled
+        if not self.enabled:
+            return nullcontext()
+        return self._page(path)
+
+    def snapshot(self) -> dict:
+        return {"totals": self.totals, "counts": self.counts, "pages": self.pages, "events": self.events}
+
+    def merge(self, snapshot: dict):
+        # adds what a worker process collected, see `snapshot`
+        for name, seconds in snapshot["totals"].items():
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+        for name, count in snapshot["counts"].items():
+            self.counts[name] = self.counts.get(name, 0) + count
+        self.pages.extend(snapshot["pages"])
+        self.events.extend(snapshot["events"])
+
+    def slowest_pages(self, top: int = 10) -> list[dict]:
+        return sorted(self.pages, key=lambda page: page["seconds"], reverse=True)[:top]
+
+    def report(self, top: int = 10) -> str:
+        lines = [f"{'stage':<14} {'count':>8} {'total ms':>10} {'avg ms':>9}"]
+        for name, seconds in sorted(self.totals.items(), key=lambda item: item[1], reverse=True):
+            count = self.counts[name]
+            lines.append(f"{name:<14} {count:>8} {seconds * 1000:>10.2f} {seconds * 1000 / count:>9.3f}")
+        if self.pages:
+            lines.append("")
+            lines.append(f"slowest {min(top, len(self.pages))} of {len(self.pages)} pages:")
+            lines.append(f"{'ms':>9} {'bytes in':>10} {'bytes out':>10}  path")
+            for page in self.slowest_pages(top):
+                lines.append(f"{page['seconds'] * 1000:>9.2f} {page['bytes_in']:>10} {page['bytes_out']:>10}  {page['path']}")
+        return "\n".join(lines)
+
+    def to_json(self) -> dict:
+        return {
+            "stages": {name: {"count": self.counts[name], "seconds": seconds} for name, seconds in self.totals.items()},
+            "pages": self.pages,
+        }
+
+    def to_chrome_trace(self) -> dict:
+        # loads in chrome://tracing and perfetto
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+    def dump(self, path: str, chrome_trace: bool = False):
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace() if chrome_trace else self.to_json(), f, indent=1)
+
+
+# the profiler of this process, pool workers get their own copy
+PROFILER = Profiler()
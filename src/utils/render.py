@@ -0,0 +1,192 @@
+import time
+import typing as t
+
+from ..enums import MarkdownBlockTypes, TextNodeTypes
+from ..textnode import TextNode
+from .blockcache import BLOCK_CACHE, block_key
+from .htmlnode import take_replaced_text_types, text_node_to_html_node
+from .markdown import block_processor, iter_blocks, iter_lines, take_replaced_block_types
+from .profiling import PROFILER
+from .textnode import inline_tokens
+
+# the same markup `text_node_to_html_node(...).to_html()` produces, minus the nodes
+_INLINE_WRAPPERS = {
+    TextNodeTypes.TEXT: ("", ""),
+    TextNodeTypes.BOLD: ("<b>", "</b>"),
+    TextNodeTypes.ITALIC: ("<i>", "</i>"),
+    TextNodeTypes.BOLD_ITALIC: ("<b><i>", "</i></b>"),
+    TextNodeTypes.CODE: ("<code>", "</code>"),
+}
+
+
+# types that are more than a wrapper around their text: text_type -> function(text, url)
+_INLINE_RENDERERS = {
+    TextNodeTypes.LINK: lambda value, url: f'<a href="{url}">{value}</a>',
+    # a LeafNode with no value renders it as "None", kept as is so both paths match
+    TextNodeTypes.IMAGE: lambda value, url: f'<img src="{url}" alt="{value}">None</img>',
+}
+
+
+def register_inline_renderer(text_type: str, render: t.Callable[[str, str], str]):
+    # the direct renderer's version of `register_text_type`, types without one here go
+    # through their HTMLNode instead
+    _forget_replaced()
+    _INLINE_RENDERERS[text_type] = render
+
+
+def _inline_html(text: str) -> str:
+    # called once per paragraph or list item, too often for a trace event each, the
+    # tokenizing is the "inline" stage and the html around it counts as "serialize"
+    if PROFILER.enabled:
+        start = time.perf_counter()
+        tokens = inline_tokens(text)
+        PROFILER.add("inline", time.perf_counter() - start)
+    else:
+        tokens = inline_tokens(text)
+    parts = []
+    append = parts.append
+    for text_type, value, url in tokens:
+        wrapper = _INLINE_WRAPPERS.get(text_type)
+        if wrapper is not None:
+            append(wrapper[0])
+            append(value)
+            append(wrapper[1])
+            continue
+        render = _INLINE_RENDERERS.get(text_type)
+        if render is not None:
+            append(render(value, url))
+        else:
+            append(text_node_to_html_node(TextNode(value, text_type, url)).to_html())
+    return "".join(parts)
+
+
+def _heading(block: str) -> str:
+    level = len(block) - len(block.lstrip("#"))
+    return f"<h{level}>{_inline_html(block[level + 1 :].strip())}</h{level}>"
+
+
+def _code(block: str) -> str:
+    return f"<pre><code>{block.strip('```')}</code></pre>"
+
+
+def _paragraph(block: str) -> str:
+    return f"<p>{_inline_html(block)}</p>"
+
+
+def _quote(block: str) -> str:
+    text = "\n".join(line[2:] for line in block.split("\n"))
+    return f"<blockquote>{_inline_html(text)}</blockquote>"
+
+
+def _unordered_list(block: str) -> str:
+    return "<ul>" + "".join(f"<li>{_inline_html(line[2:])}</li>" for line in block.split("\n")) + "</ul>"
+
+
+def _ordered_list(block: str) -> str:
+    return "<ol>" + "".join(f"<li>{_inline_html(line[3:])}</li>" for line in block.split("\n")) + "</ol>"
+
+
+_BLOCK_RENDERERS = {
+    MarkdownBlockTypes.HEADING: _heading,
+    MarkdownBlockTypes.CODE: _code,
+    MarkdownBlockTypes.PARAGRAPH: _paragraph,
+    MarkdownBlockTypes.QUOTE: _quote,
+    MarkdownBlockTypes.UNORDERED_LIST: _unordered_list,
+    MarkdownBlockTypes.ORDERED_LIST: _ordered_list,
+}
+
+
+def register_block_renderer(block_type: str, render: t.Callable[[str], str]):
+    # the direct renderer's version of `register_block_type`, block types without one
+    # here go through their HTMLNode instead
+    _forget_replaced()
+    _BLOCK_RENDERERS[block_type] = render
+
+
+def _forget_replaced():
+    # the types that were given a new processor or converter since we last looked, our
+    # markup for them (or the wrapper around the old processor) is out of date, they go
+    # through the registered function from now on
+    for block_type in take_replaced_block_types():
+        _BLOCK_RENDERERS.pop(block_type, None)
+    for text_type in take_replaced_text_types():
+        _INLINE_WRAPPERS.pop(text_type, None)
+        _INLINE_RENDERERS.pop(text_type, None)
+
+
+def _block_renderer(block_type: str) -> t.Optional[t.Callable[[str], str]]:
+    renderer = _BLOCK_RENDERERS.get(block_type)
+    if renderer is None:
+        process = block_processor(block_type)
+        if process is not None:
+            renderer = _BLOCK_RENDERERS[block_type] = lambda block: process(block).to_html()
+    return renderer
+
+
+def _timed_blocks(blocks):
+    # the block parser runs lazily between renders, so its time is summed up by hand
+    # and reported once as the "blocks" stage
+    seconds = 0.0
+    while True:
+        start = time.perf_counter()
+        block = next(blocks, None)
+        seconds += time.perf_counter() - start
+        if block is None:
+            break
+        yield block
+    PROFILER.add("blocks", seconds)
+
+
+def _render_block(renderer, block: str) -> str:
+    return renderer(block)
+
+
+def _timed_render(renderer, block: str) -> str:
+    # the time it takes to turn a block into html minus the tokenizing in it, which is
+    # timed by `_inline_html`, is the "serialize" stage like the node tree's `to_html`
+    inline = PROFILER.totals.get("inline", 0.0)
+    start = time.perf_counter()
+    html = renderer(block)
+    seconds = time.perf_counter() - start - (PROFILER.totals.get("inline", 0.0) - inline)
+    PROFILER.add("serialize", seconds)
+    return html
+
+
+def iter_markdown_html(markdown: t.Union[str, t.Iterable[str]]) -> t.Iterator[str]:
+    # the fast path: html straight from the block and inline scanners, no TextNode
+    # or HTMLNode trees in between. the output is byte for byte the same as
+    # `markdown_to_html(markdown).to_html()`, use that one when you need the tree.
+    # `markdown` can also be an open file, blocks are rendered as they're read then
+    # so memory stays bounded by the biggest block rather than the whole file.
+    _forget_replaced()
+    lines = iter_lines(markdown) if isinstance(markdown, str) else markdown
+    blocks = iter_blocks(lines)
+    render = _render_block
+    if PROFILER.enabled:
+        blocks = _timed_blocks(blocks)
+        render = _timed_render
+
+    yield "<div>"
+    for block_type, block in blocks:
+        renderer = _block_renderer(block_type)
+        if renderer is None:
+            continue
+        block = "\n".join(block)
+        if not BLOCK_CACHE.enabled:
+            yield render(renderer, block)
+            continue
+        key = block_key(block_type, block)
+        html = BLOCK_CACHE.get(key)
+        if html is None:
+            html = render(renderer, block)
+            BLOCK_CACHE.put(key, html)
+        yield html
+    yield "</div>"
+
+
+def render_markdown(markdown: t.Union[str, t.Iterable[str]]) -> str:
+    return "".join(iter_markdown_html(markdown))
+
+
+def write_markdown_html(markdown: t.Union[str, t.Iterable[str]], fp: t.TextIO):
+    fp.writelines(iter_markdown_html(markdown))
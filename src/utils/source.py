@@ -0,0 +1,116 @@
+import mmap
+import os
+import typing as t
+
+from ..enums import MarkdownBlockTypes
+from .frontmatter import split_front_matter
+from .markdown import iter_markdown_images_and_links
+from .textnode import inline_tokens
+
+# sources at least this big are mapped instead of read through a buffer
+MMAP_THRESHOLD = 1 << 20
+CHUNK_SIZE = 1 << 16
+# characters of the first paragraph kept as a page's summary
+SUMMARY_LENGTH = 200
+
+
+def _decode(line: bytes) -> str:
+    # text mode would have turned "\r\n" into "\n", same here
+    if line.endswith(b"\r"):
+        line = line[:-1]
+    return line.decode("utf-8")
+
+
+def _mapped_lines(f, size: int) -> t.Iterator[str]:
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while True:
+            end = mm.find(b"\n", start)
+            if end == -1:
+                yield _decode(mm[start:size])
+                return
+            yield _decode(mm[start:end])
+            start = end + 1
+
+
+def _chunked_lines(f, chunk_size: int) -> t.Iterator[str]:
+    # a line longer than a chunk is collected in pieces and joined once it ends
+    pending = []
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        lines = chunk.split(b"\n")
+        if len(lines) == 1:
+            pending.append(chunk)
+            continue
+        pending.append(lines[0])
+        yield _decode(b"".join(pending))
+        for line in lines[1:-1]:
+            yield _decode(line)
+        pending = [lines[-1]]
+    yield _decode(b"".join(pending))
+
+
+def iter_source_lines(
+    path: str, mmap_threshold: int = MMAP_THRESHOLD, chunk_size: int = CHUNK_SIZE
+) -> t.Iterator[str]:
+    # the lines of a markdown source without their "\n", the same as `f.read().split("\n")`
+    # but one line at a time: big files are mapped, the rest read in chunks, and every
+    # line is decoded on its own when it's reached. "\n" never shows up inside a utf-8
+    # sequence, so splitting the bytes first is safe.
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size and size >= mmap_threshold:
+            yield from _mapped_lines(f, size)
+        else:
+            yield from _chunked_lines(f, chunk_size)
+
+
+def summarize(markdown: str, length: int = SUMMARY_LENGTH) -> str:
+    # the plain text of some inline markdown, whitespace collapsed and cut at a word
+    text = " ".join("".join(value for _, value, _ in inline_tokens(markdown)).split())
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(" ", 1)[0] + "…"
+
+
+class SourceScan:
+    # wraps the lines the block parser reads and picks up what the build needs besides
+    # the html on the way: the title (the first "# " line), the
+    # urls of the links and images, which never span lines, and the first paragraph
+    # for the summary, see `on_block`. the fields are only complete once the lines have
+    # been parsed through.
+    # a front matter block at the top is read right away into `meta` and isn't passed
+    # on to the parser, so a page can be looked at (is it a draft?) before it's rendered.
+
+    def __init__(self, lines: t.Iterable[str]):
+        self.lines = iter(lines)
+        self.meta, self.pending = split_front_matter(self.lines)
+        self.title = None
+        self.links = []
+        self.summary = None
+
+    def page_title(self) -> t.Optional[str]:
+        # the front matter's title wins over the first heading
+        return self.meta.get("title") or self.title
+
+    def page_summary(self) -> str:
+        # the front matter's summary (or description) wins over the first paragraph
+        summary = self.meta.get("summary") or self.meta.get("description")
+        if summary:
+            return str(summary)
+        return self.summary or ""
+
+    def on_block(self, block_type: str, lines: list[str]):
+        # `iter_blocks` hands us the blocks it split this source into, the first paragraph
+        # is the summary. the parser's own blocks, so a fence is one for both
+        if self.summary is None and block_type == MarkdownBlockTypes.PARAGRAPH:
+            self.summary = summarize(" ".join(lines))
+
+    def __iter__(self) -> t.Iterator[str]:
+        pending, self.pending = self.pending, []
+        for lines in (pending, self.lines):
+            for line in lines:
+                if self.title is None and line.startswith("# "):
+                    self.title = line[2:]
+                if "](" in line:
+                    self.links.extend(url for _, _, url, _, _ in iter_markdown_images_and_links(line))
+                yield line
@@ -0,0 +1,220 @@
+import os
+import shutil
+
+from .crawl import DEFAULT_EXCLUDE, crawl
+from .manifest import hash_file
+
+SYNC_METHODS = ["copy", "hardlink", "reflink"]
+
+
+class SyncEntry:
+    def __init__(self, is_dir, size=0, mtime_ns=0, ino=0, dev=0):
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.ino = ino
+        self.dev = dev
+
+    def __repr__(self):
+        return f"SyncEntry({self.is_dir}, {self.size}, {self.mtime_ns})"
+
+
+class SyncStats:
+    def __init__(self):
+        self.copied = []
+        self.skipped = []
+        self.removed = []
+
+    def __repr__(self):
+        return f"SyncStats(copied={len(self.copied)}, skipped={len(self.skipped)}, removed={len(self.removed)})"
+
+
+def scan_tree(root: str, ignore=()) -> dict[str, SyncEntry]:
+    # relative path -> SyncEntry for everything under `root`, stat info comes from
+    # the DirEntry objects so we don't stat every file a second time. editor swap files
+    # and version control directories are left out on both sides, so they're never
+    # published and a .git in the destination is never deleted.
+    entries = {}
+    for entry in crawl(root, exclude=DEFAULT_EXCLUDE + tuple(ignore), ignore_files=(), stat=True, follow_symlinks=False):
+        rel = entry.rel.replace("/", os.sep)
+        if entry.is_dir:
+            entries[rel] = SyncEntry(True)
+        else:
+            entries[rel] = SyncEntry(False, entry.size, entry.mtime_ns, entry.ino, entry.dev)
+    return entries
+
+
+def _changed(src_path, src_entry, dest_path, dest_entry, checksum) -> bool:
+    if dest_entry is None or dest_entry.is_dir:
+        return True
+    if src_entry.ino and (src_entry.ino, src_entry.dev) == (dest_entry.ino, dest_entry.dev):
+        # hardlinked in a previous sync, it's the very same file. DirEntry.stat() reports
+        # 0 for both on windows, that doesn't say anything
+        return False
+    if src_entry.size != dest_entry.size:
+        return True
+    if checksum:
+        return hash_file(src_path) != hash_file(dest_path)
+    return src_entry.mtime_ns != dest_entry.mtime_ns
+
+
+def _copy_file_range(src_path, dest_path):
+    # lets the kernel do the copy, filesystems that support it (btrfs, xfs, ...)
+    # share the extents instead of duplicating the data
+    with open(src_path, "rb") as fsrc, open(dest_path, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def _transfer(src_path, dest_path, method):
+    tmp_path = dest_path + ".sync-tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+
+    if method == "hardlink":
+        try:
+            os.link(src_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+            return
+        except OSError:
+            # different filesystems or no hardlink support, fall back to a plain copy
+            pass
+
+    if method == "reflink" and hasattr(os, "copy_file_range"):
+        try:
+            _copy_file_range(src_path, tmp_path)
+        except OSError:
+            shutil.copyfile(src_path, tmp_path)
+    else:
+        shutil.copyfile(src_path, tmp_path)
+    # keep the mtime of the source, that's what the next sync compares against
+    shutil.copystat(src_path, tmp_path)
+    # replace in one step so the file is never served half-written
+    os.replace(tmp_path, dest_path)
+
+
+def _derived_from(rel: str, keep_suffixes) -> str:
+    # "index.html.gz" -> "index.html" for keep_suffixes=(".gz",), None otherwise
+    for suffix in keep_suffixes:
+        if rel.endswith(suffix):
+            return rel[: -len(suffix)]
+    return None
+
+
+def _owned_paths(owned) -> set[str]:
+    # the owned files and every directory above them
+    paths = set()
+    for rel in owned:
+        rel = os.path.normpath(rel)
+        while rel and rel not in paths:
+            paths.add(rel)
+            rel = os.path.dirname(rel)
+    return paths
+
+
+def sync_tree(src: str, dest: str, checksum=False, method="copy", ignore=(), keep_suffixes=(), owned=()) -> SyncStats:
+    # rsync-like differential sync: only copies the files whose size/mtime (or content
+    # hash when `checksum` is set) differ and only removes the files that are gone from `src`.
+    # files that only exist in `dest` but end with one of `keep_suffixes` are kept as long
+    # as the file they were made from is still in `src` (e.g. precompressed variants).
+    # `owned` are paths relative to `dest` that something else writes there (pages rendered
+    # straight into it), they and their variants are never removed or overwritten.
+    if method not in SYNC_METHODS:
+        raise ValueError(f"Invalid sync method: {method}, must be one of {SYNC_METHODS}")
+
+    src_entries = scan_tree(src, ignore)
+    dest_entries = scan_tree(dest, ignore)
+    os.makedirs(dest, exist_ok=True)
+    stats = SyncStats()
+    owned = _owned_paths(owned)
+    for rel in owned:
+        # a file in `src` at an owned path (an old staged page) loses to the owner
+        if rel in src_entries and not src_entries[rel].is_dir:
+            del src_entries[rel]
+
+    # remove the orphans first, also the entries that changed from a file to a directory
+    # or the other way around. deepest paths come first so directories are empty by then.
+    for rel in sorted(dest_entries, reverse=True):
+        src_entry = src_entries.get(rel)
+        dest_entry = dest_entries[rel]
+        if src_entry is not None and src_entry.is_dir == dest_entry.is_dir:
+            continue
+        if rel in owned:
+            continue
+        original = _derived_from(rel, keep_suffixes)
+        if src_entry is None and original is not None and (original in src_entries or original in owned):
+            continue
+        path = os.path.join(dest, rel)
+        if dest_entry.is_dir:
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        del dest_entries[rel]
+        stats.removed.append(path)
+
+    for rel in sorted(src_entries):
+        src_entry = src_entries[rel]
+        src_path = os.path.join(src, rel)
+        dest_path = os.path.join(dest, rel)
+        if src_entry.is_dir:
+            os.makedirs(dest_path, exist_ok=True)
+            continue
+        if not _changed(src_path, src_entry, dest_path, dest_entries.get(rel), checksum):
+            stats.skipped.append(dest_path)
+            continue
+        _transfer(src_path, dest_path, method)
+        stats.copied.append(dest_path)
+
+    return stats
+
+
+def sync_paths(src: str, dest: str, paths, checksum=False, method="copy", keep_suffixes=()) -> SyncStats:
+    # same as `sync_tree` but only for the given paths relative to `src`,
+    # used when we already know what changed and don't want to scan both trees.
+    # removing a file also removes its `keep_suffixes` variants.
+    if method not in SYNC_METHODS:
+        raise ValueError(f"Invalid sync method: {method}, must be one of {SYNC_METHODS}")
+
+    stats = SyncStats()
+    for rel in sorted(set(paths)):
+        src_path = os.path.join(src, rel)
+        dest_path = os.path.join(dest, rel)
+        if not os.path.lexists(src_path):
+            if os.path.isdir(dest_path) and not os.path.islink(dest_path):
+                shutil.rmtree(dest_path)
+                stats.removed.append(dest_path)
+            elif os.path.lexists(dest_path):
+                os.remove(dest_path)
+                stats.removed.append(dest_path)
+            for suffix in keep_suffixes:
+                if os.path.lexists(dest_path + suffix):
+                    os.remove(dest_path + suffix)
+                    stats.removed.append(dest_path + suffix)
+            continue
+
+        if os.path.isdir(src_path):
+            if os.path.lexists(dest_path) and not os.path.isdir(dest_path):
+                os.remove(dest_path)
+            os.makedirs(dest_path, exist_ok=True)
+            continue
+
+        if os.path.isdir(dest_path):
+            shutil.rmtree(dest_path)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        st = os.stat(src_path)
+        src_entry = SyncEntry(False, st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+        dest_entry = None
+        if os.path.exists(dest_path):
+            st = os.stat(dest_path)
+            dest_entry = SyncEntry(False, st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+        if not _changed(src_path, src_entry, dest_path, dest_entry, checksum):
+            stats.skipped.append(dest_path)
+            continue
+        _transfer(src_path, dest_path, method)
+        stats.copied.append(dest_path)
+
+    return stats
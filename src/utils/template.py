@@ -0,0 +1,72 @@
+import os
+import re
+import typing as t
+
+from .manifest import hash_bytes
+
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# path -> (mtime_ns, Template), see `load_template`
+_cache: dict[str, tuple[int, "Template"]] = {}
+
+
+class Template:
+    # a template split into static segments and the named slots between them:
+    #   segments[0] slots[0] segments[1] slots[1] ... segments[-1]
+    # so rendering is a single join instead of a full-string replace per placeholder.
+
+    def __init__(self, source: str, path: str = None):
+        self.path = path
+        self.hash = hash_bytes(source.encode())
+        self.segments = []
+        self.slots = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(source):
+            self.segments.append(source[pos : match.start()])
+            self.slots.append((match.group(1), match.group()))
+            pos = match.end()
+        self.segments.append(source[pos:])
+
+    def __repr__(self):
+        return f"Template({self.path}, {[name for name, _ in self.slots]})"
+
+    def iter_render(self, values: dict) -> t.Iterator[str]:
+        # values can be strings or html nodes, nodes are streamed chunk by chunk.
+        # slots without a value are left in the output as they were written.
+        yield self.segments[0]
+        for (name, placeholder), segment in zip(self.slots, self.segments[1:]):
+            value = values.get(name)
+            if value is None:
+                yield placeholder
+            elif hasattr(value, "iter_html"):
+                yield from value.iter_html()
+            elif isinstance(value, bytes):
+                yield value
+            else:
+                yield str(value)
+            yield segment
+
+    def render(self, **values) -> str:
+        return "".join(self.iter_render(values))
+
+    def render_bytes(self, **values) -> bytes:
+        # `render(...).encode()` without the page ever being held as a string too.
+        # bytes values, like already encoded html, go in as they are
+        return b"".join(part if isinstance(part, bytes) else part.encode() for part in self.iter_render(values))
+
+    def write(self, fp: t.TextIO, **values):
+        fp.writelines(self.iter_render(values))
+
+
+def load_template(path: str) -> Template:
+    # compiled templates are cached by path, a template is only read again
+    # when its mtime changes, so any number of layouts can be used in a build.
+    mtime_ns = os.stat(path).st_mtime_ns
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    with open(path, "r") as f:
+        template = Template(f.read(), path)
+    _cache[path] = (mtime_ns, template)
+    return template
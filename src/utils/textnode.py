@@ -1,37 +1,38 @@
+import re
+
 from ..enums import TextNodeTypes
 from ..textnode import TextNode
-from .markdown import extract_markdown_images, extract_markdown_links
+from .markdown import iter_markdown_images_and_links, match_markdown_image_or_link
 
 
 def split_text_node_delimiter(
     node: TextNode, delimiter: str, text_type: str
 ) -> list[TextNode]:
-    # this function won't work if the text node has both * and ** in it.
+    # this function won't work if the text node has both * and ** in it,
+    # `text_to_textnodes` doesn't use it anymore, see `_INLINE_TOKENS` below.
     nodes = []
     Ld = len(delimiter)
-    if delimiter in node.text:
-        text = node.text
-        while delimiter in text:
-            start_ix = text.index(delimiter)
-            try:
-                end_ix = text[start_ix + Ld :].index(delimiter) + start_ix + Ld
-            except ValueError:
-                raise ValueError(f"Delimiter {delimiter} not closed in text: {text}")
-
-            first_part = text[:start_ix]
-            part = text[start_ix + Ld : end_ix]
-            second_part = text[end_ix + Ld :]
-
-            if len(first_part) > 0:
-                nodes.append(TextNode(first_part, TextNodeTypes.TEXT))
-
-            nodes.append(TextNode(part, text_type))
-
-            text = second_part
-        if len(text) > 0:
-            nodes.append(TextNode(text, TextNodeTypes.TEXT))
-    else:
-        nodes.append(node)
+    text = node.text
+    start_ix = text.find(delimiter)
+    if start_ix == -1:
+        return [node]
+
+    # walk the text with positions instead of slicing the rest of it on every delimiter
+    pos = 0
+    while start_ix != -1:
+        end_ix = text.find(delimiter, start_ix + Ld)
+        if end_ix == -1:
+            raise ValueError(f"Delimiter {delimiter} not closed in text: {text[pos:]}")
+
+        if start_ix > pos:
+            nodes.append(TextNode(text[pos:start_ix], TextNodeTypes.TEXT))
+
+        nodes.append(TextNode(text[start_ix + Ld : end_ix], text_type))
+
+        pos = end_ix + Ld
+        start_ix = text.find(delimiter, pos)
+    if pos < len(text):
+        nodes.append(TextNode(text[pos:], TextNodeTypes.TEXT))
     return nodes
 
 
@@ -52,44 +53,95 @@ def split_nodes_image_or_link(
         raise ValueError(
             f"text_type must be either '{TextNodeTypes.IMAGE}' or '{TextNodeTypes.LINK}'"
         )
-    elif text_type == TextNodeTypes.IMAGE:
-        fn = extract_markdown_images
-        extra_char = "!"
-    elif text_type == TextNodeTypes.LINK:
-        fn = extract_markdown_links
-        extra_char = ""
-
-    def splitter(old_nodes: list[TextNode]) -> list[TextNode]:
-        nodes = []
-        for old_node in old_nodes:
-            text = old_node.text
-            parts = fn(text)
-            if len(parts) == 0:
-                nodes.append(old_node)
-                continue
-            for part in parts:
-                part_text = extra_char + f"[{part[0]}]({part[1]})"
-                start_ix = text.index(part_text)
-                first_part = text[:start_ix]
-                if len(first_part) > 0:
-                    nodes.append(TextNode(first_part, TextNodeTypes.TEXT))
-                nodes.append(TextNode(part[0], text_type, part[1]))
-                text = text[start_ix + len(part_text) :]
-            if len(text) > 0:
-                nodes.append(TextNode(text, TextNodeTypes.TEXT))
-        return nodes
 
-    return splitter(old_nodes)
+    nodes = []
+    for old_node in old_nodes:
+        text = old_node.text
+        if "](" not in text:
+            # most nodes are plain text, skip starting a scan for those
+            nodes.append(old_node)
+            continue
+        # the scanner hands back where each match is, no need to look for it again
+        pos = 0
+        for _, value, url, start, end in iter_markdown_images_and_links(text, text_type):
+            if start > pos:
+                nodes.append(TextNode(text[pos:start], TextNodeTypes.TEXT))
+            nodes.append(TextNode(value, text_type, url))
+            pos = end
+        if pos == 0:
+            nodes.append(old_node)
+        elif pos < len(text):
+            nodes.append(TextNode(text[pos:], TextNodeTypes.TEXT))
+    return nodes
 
 
-def text_to_textnodes(text: str) -> list[TextNode]:
-    delimiters = ["**", "*", "`"]
-    names = [TextNodeTypes.BOLD, TextNodeTypes.ITALIC, TextNodeTypes.CODE]
-    nodes = [TextNode(text, TextNodeTypes.TEXT)]
+# everything that can start an inline element, `**` has to come before `*`
+# and `![` before `[` so the longer token wins.
+_INLINE_TOKENS = re.compile(r"\*\*|\*|`|!\[|\[")
+
+_EMPHASIS_TYPES = {
+    (False, False): TextNodeTypes.TEXT,
+    (True, False): TextNodeTypes.BOLD,
+    (False, True): TextNodeTypes.ITALIC,
+    (True, True): TextNodeTypes.BOLD_ITALIC,
+}
+
+
+def inline_tokens(text: str) -> list[tuple[str, str, str]]:
+    # single pass over the text: jump from one inline token to the next, code spans,
+    # images and links are consumed whole so their contents are never re-parsed,
+    # `*` and `**` just toggle the current emphasis so they can be nested or mixed.
+    # returns (text_type, text, url) tuples, `text_to_textnodes` turns them into nodes
+    # and the direct renderer turns them straight into html.
+    tokens = []
+    bold = italic = False
+    segment_start = pos = 0
+
+    search = _INLINE_TOKENS.search
+    while True:
+        match = search(text, pos)
+        if match is None:
+            break
+        token = match.group()
+        start = match.start()
+
+        if token == "**" or token == "*":
+            if start > segment_start:
+                tokens.append((_EMPHASIS_TYPES[(bold, italic)], text[segment_start:start], None))
+            if token == "**":
+                bold = not bold
+            else:
+                italic = not italic
+            pos = segment_start = start + len(token)
+        elif token == "`":
+            end = text.find("`", start + 1)
+            if end == -1:
+                raise ValueError(f"Delimiter ` not closed in text: {text}")
+            if start > segment_start:
+                tokens.append((_EMPHASIS_TYPES[(bold, italic)], text[segment_start:start], None))
+            tokens.append((TextNodeTypes.CODE, text[start + 1 : end], None))
+            pos = segment_start = end + 1
+        else:
+            element = match_markdown_image_or_link(text, start)
+            if element is None:
+                # just a bracket, keep it as text
+                pos = start + len(token)
+                continue
+            text_type, value, url, end = element
+            if start > segment_start:
+                tokens.append((_EMPHASIS_TYPES[(bold, italic)], text[segment_start:start], None))
+            tokens.append((text_type, value, url))
+            pos = segment_start = end
 
-    for delimiter, name in zip(delimiters, names):
-        nodes = split_text_nodes_delimiter(nodes, delimiter, name)
-    nodes = split_nodes_image_or_link(nodes, TextNodeTypes.IMAGE)
-    nodes = split_nodes_image_or_link(nodes, TextNodeTypes.LINK)
+    if bold:
+        raise ValueError(f"Delimiter ** not closed in text: {text}")
+    if italic:
+        raise ValueError(f"Delimiter * not closed in text: {text}")
+    if len(text) > segment_start:
+        tokens.append((_EMPHASIS_TYPES[(bold, italic)], text[segment_start:], None))
 
-    return nodes
+    return tokens
+
+
+def text_to_textnodes(text: str) -> list[TextNode]:
+    return [TextNode(value, text_type, url) for text_type, value, url in inline_tokens(text)]
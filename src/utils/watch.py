@@ -0,0 +1,167 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from .sync import scan_tree
+
+# from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+_EVENT = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    # fallback for platforms without inotify: rescans the watched paths and diffs
+    # (size, mtime) snapshots, so it's only as fast as a scan of the whole tree.
+
+    def __init__(self, paths: list[str]):
+        self.paths = paths
+        self.snapshot = self._scan()
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                for rel, entry in scan_tree(path).items():
+                    snapshot[os.path.join(path, rel)] = (entry.is_dir, entry.size, entry.mtime_ns)
+            elif os.path.exists(path):
+                st = os.stat(path)
+                snapshot[path] = (False, st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout: float) -> set[str]:
+        time.sleep(timeout)
+        snapshot = self._scan()
+        changes = {path for path in snapshot.keys() | self.snapshot.keys() if snapshot.get(path) != self.snapshot.get(path)}
+        self.snapshot = snapshot
+        return changes
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    # watches every directory under the given paths with inotify, files are watched
+    # through their parent directory so editors that save by renaming still get noticed.
+
+    def __init__(self, paths: list[str]):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.dirs = {}  # watch descriptor -> directory
+        self.files = set()  # files watched through their parent directory
+        self.roots = []  # directories watched recursively
+        for path in paths:
+            if os.path.isdir(path):
+                self.roots.append(os.path.normpath(path))
+                self._add_tree(path)
+            else:
+                self.files.add(os.path.normpath(path))
+                self._add(os.path.dirname(path) or ".")
+
+    def _add(self, directory: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            # the directory may already be gone again, nothing to watch then
+            return
+        self.dirs[wd] = directory
+
+    def _add_tree(self, root: str):
+        self._add(root)
+        for rel, entry in scan_tree(root).items():
+            if entry.is_dir:
+                self._add(os.path.join(root, rel))
+
+    def _wanted(self, path: str) -> bool:
+        path = os.path.normpath(path)
+        if path in self.files:
+            return True
+        return any(path == root or path.startswith(root + os.sep) for root in self.roots)
+
+    def read(self, timeout: float) -> set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changes = set()
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos < len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size : pos + _EVENT.size + length].rstrip(b"\0")
+                pos += _EVENT.size + length
+
+                directory = self.dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self.dirs[wd]
+                    continue
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                if not self._wanted(path):
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    # new directories need their own watches, and whatever was
+                    # moved in with them counts as changed too
+                    self._add_tree(path)
+                    changes.update(os.path.join(path, rel) for rel in scan_tree(path))
+                changes.add(path)
+        return changes
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(paths: list[str]):
+    try:
+        return InotifyWatcher(paths)
+    except (OSError, AttributeError):
+        return PollingWatcher(paths)
+
+
+def watch(paths: list[str], callback, debounce: float = 0.05, interval: float = 0.5, stop=None, watcher=None):
+    # calls `callback` with the set of changed paths. a burst of events (an editor saving
+    # a few files, a `git checkout`) is collected until it's been quiet for `debounce`
+    # seconds and then handed over in a single call. `stop` is a threading.Event.
+    watcher = watcher or create_watcher(paths)
+    try:
+        while stop is None or not stop.is_set():
+            changes = watcher.read(interval)
+            if not changes:
+                continue
+            while True:
+                more = watcher.read(debounce)
+                if not more:
+                    break
+                changes |= more
+            callback(changes)
+    finally:
+        watcher.close()